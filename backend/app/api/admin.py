@@ -1,16 +1,22 @@
 ﻿# backend/app/api/admin.py
 from __future__ import annotations
 
+import zipfile
 from datetime import date
+from pathlib import Path
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, File, Form, UploadFile
+import psycopg
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
 
 from app.celery_client import celery_client
 from app.config import settings
 from app.db import get_conn
 from app.deps import require_admin_token
-from app.storage import save_upload_file
+from app.services.bulk_import import MANIFEST_NAME, parse_manifest
+from app.services.corpus import bump_epoch, publish_epoch
+from app.services.dedup import VersionClone, clone_identical_version
+from app.storage import StoredFile, save_stream, save_upload_file
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -33,8 +39,9 @@ def create_document(
 ):
     document_id = str(uuid4())
     version_id = str(uuid4())
+    job_id = str(uuid4())
 
-    file_path = save_upload_file(settings.files_dir, version_id, file)
+    stored = save_upload_file(settings.files_dir, file)
 
     with get_conn() as conn:
         with conn.cursor() as cur:
@@ -48,10 +55,10 @@ def create_document(
             cur.execute(
                 """
                 INSERT INTO document_versions (
-                    id, document_id, version_label, effective_date, published_date,
-                    revision_date, language, categories, tags, trust_level, source_uri, file_path
+                    id, document_id, version_label, effective_date, published_date, revision_date,
+                    language, categories, tags, trust_level, source_uri, file_path, file_sha256
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """,
                 (
                     version_id,
@@ -65,23 +72,25 @@ def create_document(
                     tags,
                     trust_level,
                     source_uri,
-                    file_path,
+                    stored.path,
+                    stored.sha256,
                 ),
             )
-            cur.execute(
-                """
-                INSERT INTO ingestion_jobs (document_version_id, status)
-                VALUES (%s, %s)
-                RETURNING id
-                """,
-                (version_id, "queued"),
-            )
-            job_id = cur.fetchone()["id"]
+            clone = _create_ingestion_job(cur, job_id, version_id, stored)
+            epoch = bump_epoch(cur) if clone else None
         conn.commit()
 
-    celery_client.send_task("worker.ingest_document_version", args=[version_id, str(job_id)])
+    if clone:
+        publish_epoch(epoch)
+    else:
+        celery_client.send_task("worker.ingest_document_version", args=[version_id, job_id])
 
-    return {"document_id": document_id, "version_id": version_id, "ingestion_job_id": str(job_id)}
+    return {
+        "document_id": document_id,
+        "version_id": version_id,
+        "ingestion_job_id": job_id,
+        "reused_version_id": clone.source_version_id if clone else None,
+    }
 
 
 @router.post("/documents/{document_id}/versions", dependencies=[Depends(require_admin_token)])
@@ -99,17 +108,18 @@ def create_document_version(
     file: UploadFile = File(...),
 ):
     version_id = str(uuid4())
-    file_path = save_upload_file(settings.files_dir, version_id, file)
+    job_id = str(uuid4())
+    stored = save_upload_file(settings.files_dir, file)
 
     with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
                 INSERT INTO document_versions (
-                    id, document_id, version_label, effective_date, published_date,
-                    revision_date, language, categories, tags, trust_level, source_uri, file_path
+                    id, document_id, version_label, effective_date, published_date, revision_date,
+                    language, categories, tags, trust_level, source_uri, file_path, file_sha256
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """,
                 (
                     version_id,
@@ -123,23 +133,243 @@ def create_document_version(
                     tags,
                     trust_level,
                     source_uri,
-                    file_path,
+                    stored.path,
+                    stored.sha256,
                 ),
             )
+            clone = _create_ingestion_job(cur, job_id, version_id, stored)
+            epoch = bump_epoch(cur) if clone else None
+        conn.commit()
+
+    if clone:
+        publish_epoch(epoch)
+    else:
+        celery_client.send_task("worker.ingest_document_version", args=[version_id, job_id])
+
+    return {
+        "version_id": version_id,
+        "ingestion_job_id": job_id,
+        "reused_version_id": clone.source_version_id if clone else None,
+    }
+
+
+def _create_ingestion_job(
+    cur: psycopg.Cursor,
+    job_id: str,
+    version_id: str,
+    stored: StoredFile,
+    import_batch_id: str | None = None,
+) -> VersionClone | None:
+    # A file already ingested with the same embeddings model is cloned in SQL
+    # and its job completed here; otherwise the job is queued for the worker.
+    clone = clone_identical_version(cur, version_id, stored.sha256, settings.embeddings_model)
+    if clone is None:
+        cur.execute(
+            """
+            INSERT INTO ingestion_jobs (id, document_version_id, status, import_batch_id)
+            VALUES (%s, %s, %s, %s)
+            """,
+            (job_id, version_id, "queued", import_batch_id),
+        )
+    else:
+        cur.execute(
+            """
+            INSERT INTO ingestion_jobs (
+                id, document_version_id, status, import_batch_id,
+                started_at, finished_at, chunks_total, chunks_reused
+            )
+            VALUES (%s, %s, %s, %s, NOW(), NOW(), %s, %s)
+            """,
+            (job_id, version_id, "completed", import_batch_id, clone.chunks, clone.chunks),
+        )
+    return clone
+
+
+def _enqueue_ingestion(jobs: list[tuple[str, str]]) -> None:
+    # One broker connection for the whole batch instead of one per send_task.
+    with celery_client.producer_or_acquire() as producer:
+        for version_id, job_id in jobs:
+            celery_client.send_task("worker.ingest_document_version", args=[version_id, job_id], producer=producer)
+
+
+@router.post("/imports", dependencies=[Depends(require_admin_token)])
+def create_import(
+    archive: UploadFile = File(...),
+    institution: str | None = Form(default=None),
+):
+    # The archive is a zip with manifest.csv at its root (see
+    # services/bulk_import.py for the columns) next to the files it lists.
+    try:
+        bundle = zipfile.ZipFile(archive.file)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="archive must be a zip file")
+
+    with bundle:
+        members = {info.filename: info for info in bundle.infolist() if not info.is_dir()}
+        if MANIFEST_NAME not in members:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{MANIFEST_NAME} missing from archive")
+        rows, errors = parse_manifest(bundle.read(MANIFEST_NAME).decode("utf-8-sig"), institution)
+        errors += [f"line {row.line}: {row.file} not found in archive" for row in rows if row.file not in members]
+        if errors:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail={"errors": errors})
+
+        batch_id = str(uuid4())
+        created = []
+        with get_conn() as conn:
+            conn.execute(
+                """
+                INSERT INTO import_batches (id, source_name, documents_total, documents_expected)
+                VALUES (%s, %s, 0, %s)
+                """,
+                (batch_id, archive.filename, len(rows)),
+            )
+            conn.commit()
+
+            # Each slice is committed and enqueued before the next is unpacked,
+            # so workers start on the first documents while the rest is stored.
+            # documents_total grows with every committed slice, so a batch that
+            # stops part way still reports (and finishes) what it did import.
+            try:
+                for offset in range(0, len(rows), settings.bulk_import_batch_size):
+                    entries = []
+                    for row in rows[offset : offset + settings.bulk_import_batch_size]:
+                        with bundle.open(members[row.file]) as source:
+                            stored = save_stream(settings.files_dir, Path(row.file).name, source)
+                        entries.append((row, str(uuid4()), str(uuid4()), str(uuid4()), stored))
+
+                    with conn.cursor() as cur:
+                        cur.executemany(
+                            "INSERT INTO documents (id, title, institution, source_type) VALUES (%s, %s, %s, %s)",
+                            [(document_id, row.title, row.institution, row.source_type) for row, document_id, *_ in entries],
+                        )
+                        cur.executemany(
+                            """
+                            INSERT INTO document_versions (
+                                id, document_id, version_label, effective_date, published_date, revision_date,
+                                language, categories, tags, trust_level, source_uri, file_path, file_sha256
+                            )
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                            """,
+                            [
+                                (
+                                    version_id,
+                                    document_id,
+                                    row.version_label,
+                                    row.effective_date,
+                                    row.published_date,
+                                    row.revision_date,
+                                    row.language,
+                                    row.categories,
+                                    row.tags,
+                                    row.trust_level,
+                                    row.source_uri,
+                                    stored.path,
+                                    stored.sha256,
+                                )
+                                for row, document_id, version_id, _, stored in entries
+                            ],
+                        )
+                        queued = []
+                        for _, _, version_id, job_id, stored in entries:
+                            if _create_ingestion_job(cur, job_id, version_id, stored, batch_id) is None:
+                                queued.append((version_id, job_id))
+                        epoch = bump_epoch(cur) if len(queued) < len(entries) else None
+                        cur.execute(
+                            "UPDATE import_batches SET documents_total = documents_total + %s WHERE id = %s",
+                            (len(entries), batch_id),
+                        )
+                    conn.commit()
+                    created.extend(
+                        {
+                            "file": row.file,
+                            "document_id": document_id,
+                            "version_id": version_id,
+                            "ingestion_job_id": job_id,
+                        }
+                        for row, document_id, version_id, job_id, _ in entries
+                    )
+
+                    if epoch is not None:
+                        publish_epoch(epoch)
+                    if queued:
+                        _enqueue_ingestion(queued)
+            except Exception as exc:
+                conn.rollback()
+                conn.execute(
+                    "UPDATE import_batches SET status = 'failed', error_message = %s WHERE id = %s",
+                    (str(exc), batch_id),
+                )
+                conn.commit()
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail={
+                        "import_batch_id": batch_id,
+                        "status": "failed",
+                        "error": str(exc),
+                        "documents_total": len(created),
+                        "documents": created,
+                    },
+                ) from exc
+
+            conn.execute("UPDATE import_batches SET status = 'imported' WHERE id = %s", (batch_id,))
+            conn.commit()
+
+    return {"import_batch_id": batch_id, "status": "imported", "documents_total": len(created), "documents": created}
+
+
+@router.get("/imports/{batch_id}", dependencies=[Depends(require_admin_token)])
+def get_import(batch_id: str):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
             cur.execute(
                 """
-                INSERT INTO ingestion_jobs (document_version_id, status)
-                VALUES (%s, %s)
-                RETURNING id
+                SELECT
+                    import_batches.id,
+                    import_batches.source_name,
+                    import_batches.documents_total,
+                    import_batches.documents_expected,
+                    import_batches.status,
+                    import_batches.error_message,
+                    import_batches.created_at,
+                    COUNT(ingestion_jobs.id) FILTER (WHERE ingestion_jobs.status = 'queued') AS queued,
+                    COUNT(ingestion_jobs.id) FILTER (WHERE ingestion_jobs.status = 'processing') AS processing,
+                    COUNT(ingestion_jobs.id) FILTER (WHERE ingestion_jobs.status = 'completed') AS completed,
+                    COUNT(ingestion_jobs.id) FILTER (WHERE ingestion_jobs.status = 'failed') AS failed,
+                    COALESCE(SUM(ingestion_jobs.chunks_total), 0) AS chunks_total,
+                    COALESCE(SUM(ingestion_jobs.chunks_reused), 0) AS chunks_reused,
+                    MAX(ingestion_jobs.finished_at) AS last_finished_at
+                FROM import_batches
+                LEFT JOIN ingestion_jobs ON ingestion_jobs.import_batch_id = import_batches.id
+                WHERE import_batches.id = %s
+                GROUP BY import_batches.id
                 """,
-                (version_id, "queued"),
+                (batch_id,),
             )
-            job_id = cur.fetchone()["id"]
-        conn.commit()
+            batch = cur.fetchone()
+            if batch is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="import batch not found")
 
-    celery_client.send_task("worker.ingest_document_version", args=[version_id, str(job_id)])
+            cur.execute(
+                """
+                SELECT id, document_version_id, error_message
+                FROM ingestion_jobs
+                WHERE import_batch_id = %s AND status = 'failed'
+                ORDER BY finished_at
+                LIMIT 50
+                """,
+                (batch_id,),
+            )
+            failures = cur.fetchall()
 
-    return {"version_id": version_id, "ingestion_job_id": str(job_id)}
+    finished = batch["completed"] + batch["failed"]
+    total = batch["documents_total"]
+    return {
+        **batch,
+        "progress": finished / total if total else 1.0,
+        # An import still storing files may commit more documents.
+        "done": batch["status"] != "importing" and finished >= total,
+        "failures": failures,
+    }
 
 
 @router.get("/documents", dependencies=[Depends(require_admin_token)])
@@ -184,8 +414,10 @@ def activate_version(version_id: str):
                 "UPDATE document_versions SET is_active = TRUE, updated_at = NOW() WHERE id = %s",
                 (version_id,),
             )
+            epoch = bump_epoch(cur)
         conn.commit()
-    return {"version_id": version_id, "is_active": True}
+    publish_epoch(epoch)
+    return {"version_id": version_id, "is_active": True, "corpus_epoch": epoch}
 
 
 @router.get("/ingestion-jobs/{job_id}", dependencies=[Depends(require_admin_token)])
@@ -193,7 +425,13 @@ def get_ingestion_job(job_id: str):
     with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                "SELECT id, document_version_id, status, error_message FROM ingestion_jobs WHERE id = %s",
+                """
+                SELECT
+                    id, document_version_id, status, error_message, chunks_total, chunks_reused,
+                    chunks_reused::FLOAT8 / NULLIF(chunks_total, 0) AS reuse_ratio, stage_timings
+                FROM ingestion_jobs
+                WHERE id = %s
+                """,
                 (job_id,),
             )
             job = cur.fetchone()
@@ -206,7 +444,7 @@ def explain_conversation(conversation_id: str):
         with conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT id, retrieved_chunk_ids, similarity_scores, rerank_scores, filters, corpus_snapshot_id
+                SELECT id, retrieved_chunk_ids, similarity_scores, rerank_scores, filters, corpus_snapshot_id, stage_timings
                 FROM retrieval_traces
                 WHERE conversation_id = %s
                 ORDER BY created_at DESC
@@ -268,6 +506,7 @@ def explain_conversation(conversation_id: str):
             "id": str(trace["id"]),
             "filters": trace["filters"],
             "corpus_snapshot_id": trace["corpus_snapshot_id"],
+            "stage_timings": trace["stage_timings"],
         },
         "chunks": ordered,
     }
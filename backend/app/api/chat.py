@@ -1,40 +1,60 @@
 ﻿# backend/app/api/chat.py
 from __future__ import annotations
 
-from fastapi import APIRouter
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator
+from uuid import uuid4
 
-from app.db import get_conn
+import httpx
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+from psycopg.types.json import Jsonb
+
+from app.db import get_async_conn
 from app.schemas import AnswerOut, ConversationMessagesOut, ConversationOut, FeedbackCreateRequest, MessageCreateRequest
 from app.config import settings
-from app.services.answerer import generate_answer, has_min_relevance
+from app.services.answer_cache import AnswerCacheScope, filters_key, lookup_answer, store_answer
+from app.services.answerer import generate_answer, has_min_relevance, stream_answer
+from app.services.cache import normalize_query
+from app.services.coalescing import coalesced, flight_key
+from app.services.corpus import current_epoch
+from app.services.persistence import MessageRow, TraceRow, persist, wait_for_pending_writes
 from app.services.reranker import rerank_chunks
 from app.services.retrieval import retrieve_chunks
+from app.services.timing import current_timings, stage, timed_stage
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 
 @router.post("/conversations", response_model=ConversationOut)
-def create_conversation():
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute("INSERT INTO conversations DEFAULT VALUES RETURNING id")
-            conversation_id = cur.fetchone()["id"]
-        conn.commit()
+async def create_conversation():
+    async with get_async_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("INSERT INTO conversations DEFAULT VALUES RETURNING id")
+            conversation_id = (await cur.fetchone())["id"]
+        await conn.commit()
     return {"id": conversation_id}
 
 
-@router.post("/conversations/{conversation_id}/messages", response_model=AnswerOut)
-def create_message(conversation_id: str, request: MessageCreateRequest):
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "INSERT INTO messages (conversation_id, role, content) VALUES (%s, %s, %s) RETURNING id",
-                (conversation_id, "user", request.content),
-            )
-            user_message_id = cur.fetchone()["id"]
-        conn.commit()
+def _not_found_answer() -> dict:
+    # A fresh dict each time: answers are cached, shared and mutated downstream.
+    return {
+        "answer_text": "I could not find this in the corpus.",
+        "steps": None,
+        "citations": [],
+        "confidence": "abstain",
+        "follow_up_questions": ["Is there a specific policy or institution you want me to check?"],
+    }
+
+
+@timed_stage("persist")
+async def _store_user_message(conversation_id: str, content: str) -> None:
+    await persist([MessageRow(uuid4(), conversation_id, "user", content, datetime.now(timezone.utc))])
+
 
-    chunks = retrieve_chunks(
+async def _select_chunks(request: MessageCreateRequest) -> list[dict]:
+    chunks = await retrieve_chunks(
         query=request.content,
         top_k=request.top_k,
         institution=request.institution,
@@ -43,76 +63,221 @@ def create_message(conversation_id: str, request: MessageCreateRequest):
         effective_date_start=request.effective_date_start,
         effective_date_end=request.effective_date_end,
         active_only=True,
+        mode=request.retrieval_mode,
     )
 
     if settings.reranker_model:
-        chunks = rerank_chunks(request.content, chunks, settings.reranker_top_n)
-
-    if not has_min_relevance(chunks):
-        answer = {
-            "answer_text": "I could not find this in the corpus.",
-            "steps": None,
-            "citations": [],
-            "confidence": "abstain",
-            "follow_up_questions": ["Is there a specific policy or institution you want me to check?"],
-        }
-    else:
-        answer = generate_answer(chunks)
-
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "INSERT INTO messages (conversation_id, role, content) VALUES (%s, %s, %s) RETURNING id",
-                (conversation_id, "assistant", answer["answer_text"]),
-            )
-            assistant_message_id = cur.fetchone()["id"]
+        with stage("rerank"):
+            chunks = await rerank_chunks(request.content, chunks, settings.reranker_top_n)
+    return chunks
+
+
+async def _lookup_cached_answer(
+    request: MessageCreateRequest,
+    corpus_epoch: int,
+) -> tuple[AnswerCacheScope | None, tuple[dict, list[dict]] | None]:
+    if not settings.answer_cache_enabled:
+        return None, None
+    return await lookup_answer(request, corpus_epoch)
+
+
+def _answer_flight_key(request: MessageCreateRequest, corpus_epoch: int) -> str:
+    return flight_key("chat", str(corpus_epoch), normalize_query(request.content), filters_key(request))
+
+
+# A flight's result is (answer, chunks, error). A leader whose LLM call failed
+# shares the error, so followers report it instead of each retrying upstream.
+SharedAnswer = tuple[dict, list[dict], str | None]
+
+
+def _dump_answer(result: SharedAnswer) -> str:
+    answer, chunks, error = result
+    return json.dumps({"answer": answer, "chunks": chunks, "error": error}, default=str)
+
+
+def _load_answer(payload: bytes) -> SharedAnswer:
+    data = json.loads(payload)
+    return data["answer"], data["chunks"], data.get("error")
 
-            cur.execute(
-                """
-                INSERT INTO retrieval_traces (
-                    conversation_id, message_id, retrieved_chunk_ids, similarity_scores,
-                    rerank_scores, filters, corpus_snapshot_id
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    conversation_id,
-                    assistant_message_id,
-                    [chunk["chunk_id"] for chunk in chunks],
-                    [chunk["score"] for chunk in chunks],
-                    [chunk.get("rerank_score") for chunk in chunks] if settings.reranker_model else None,
-                    {
-                        "institution": request.institution,
-                        "language": request.language,
-                        "categories": request.categories,
-                        "effective_date_start": request.effective_date_start.isoformat() if request.effective_date_start else None,
-                        "effective_date_end": request.effective_date_end.isoformat() if request.effective_date_end else None,
-                    },
-                    None,
-                ),
-            )
-        conn.commit()
 
+def _failed_answer() -> dict:
+    # Stored for requests whose LLM call failed; never cached.
+    return {
+        "answer_text": "The answer could not be generated. Please try again.",
+        "steps": None,
+        "citations": [],
+        "confidence": "abstain",
+        "follow_up_questions": None,
+    }
+
+
+@timed_stage("persist")
+async def _store_assistant_message(
+    conversation_id: str,
+    request: MessageCreateRequest,
+    chunks: list[dict],
+    answer: dict,
+    corpus_epoch: int,
+    cache_hit: bool = False,
+    shared: bool = False,
+    error: str | None = None,
+) -> str:
+    # Stages up to this point; the persist stage itself only reaches metrics.
+    timings = current_timings()
+    created_at = datetime.now(timezone.utc)
+    message = MessageRow(uuid4(), conversation_id, "assistant", answer["answer_text"], created_at)
+    trace = TraceRow(
+        conversation_id=conversation_id,
+        message_id=message.id,
+        retrieved_chunk_ids=[chunk["chunk_id"] for chunk in chunks],
+        similarity_scores=[chunk["score"] for chunk in chunks],
+        rerank_scores=[chunk.get("rerank_score") for chunk in chunks] if settings.reranker_model else None,
+        filters=Jsonb(
+            {
+                "institution": request.institution,
+                "language": request.language,
+                "categories": request.categories,
+                "effective_date_start": request.effective_date_start.isoformat() if request.effective_date_start else None,
+                "effective_date_end": request.effective_date_end.isoformat() if request.effective_date_end else None,
+                "retrieval_mode": request.retrieval_mode,
+                "answer_cache_hit": cache_hit,
+                "coalesced": shared,
+                "llm_error": error,
+            }
+        ),
+        corpus_snapshot_id=str(corpus_epoch),
+        stage_timings=Jsonb(timings.as_milliseconds()) if timings is not None else None,
+        created_at=created_at,
+    )
+    await persist([message, trace])
+    return str(message.id)
+
+
+def _sse(event: str, data: object) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _answer_event(answer: dict) -> str:
+    # Every path (cache hit, coalesced follower, leader) sends the same schema.
+    return _sse("answer", AnswerOut.model_validate(answer).model_dump(mode="json"))
+
+
+@router.post("/conversations/{conversation_id}/messages", response_model=AnswerOut)
+async def create_message(conversation_id: str, request: MessageCreateRequest):
+    await _store_user_message(conversation_id, request.content)
+    corpus_epoch = await current_epoch()
+    scope, cached = await _lookup_cached_answer(request, corpus_epoch)
+    if cached is not None:
+        answer, chunks = cached
+        await _store_assistant_message(conversation_id, request, chunks, answer, corpus_epoch, cache_hit=True)
+        return answer
+
+    # Identical questions arriving together share one retrieval and LLM call.
+    async with coalesced(_answer_flight_key(request, corpus_epoch), _dump_answer, _load_answer) as flight:
+        shared = await flight.shared()
+        if shared is not None:
+            answer, chunks, error = shared
+        else:
+            chunks = await _select_chunks(request)
+            error = None
+            if not has_min_relevance(chunks):
+                answer = _not_found_answer()
+            else:
+                try:
+                    answer = await generate_answer(chunks)
+                except httpx.HTTPError as exc:
+                    answer, error = _failed_answer(), str(exc)
+                else:
+                    if scope is not None:
+                        await store_answer(scope, answer, chunks)
+            flight.set_result((answer, chunks, error))
+
+    await _store_assistant_message(
+        conversation_id, request, chunks, answer, corpus_epoch, shared=shared is not None, error=error
+    )
+    if error is not None:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=error)
     return answer
 
 
+@router.post("/conversations/{conversation_id}/messages/stream")
+async def stream_message(conversation_id: str, request: MessageCreateRequest):
+    await _store_user_message(conversation_id, request.content)
+    corpus_epoch = await current_epoch()
+    scope, cached = await _lookup_cached_answer(request, corpus_epoch)
+
+    async def events() -> AsyncIterator[str]:
+        # Claims and steps are provisional; the final "answer" event carries the
+        # fully validated AnswerOut and is the one clients should keep.
+        if cached is not None:
+            answer, chunks = cached
+            yield _answer_event(answer)
+            message_id = await _store_assistant_message(
+                conversation_id, request, chunks, answer, corpus_epoch, cache_hit=True
+            )
+            yield _sse("done", {"message_id": message_id})
+            return
+
+        # Only the leader streams claims; requests coalesced onto it receive
+        # the final answer, or the leader's LLM error, once it is complete.
+        async with coalesced(_answer_flight_key(request, corpus_epoch), _dump_answer, _load_answer) as flight:
+            shared = await flight.shared()
+            if shared is not None:
+                answer, chunks, error = shared
+            else:
+                chunks = await _select_chunks(request)
+                answer, error = _not_found_answer(), None
+                if has_min_relevance(chunks):
+                    try:
+                        async for event, value in stream_answer(chunks):
+                            if event == "answer":
+                                answer = value
+                            else:
+                                yield _sse(event, value)
+                    except httpx.HTTPError as exc:
+                        answer, error = _failed_answer(), str(exc)
+                    else:
+                        if scope is not None:
+                            await store_answer(scope, answer, chunks)
+                flight.set_result((answer, chunks, error))
+
+        if error is not None:
+            yield _sse("error", {"detail": error})
+        else:
+            yield _answer_event(answer)
+        message_id = await _store_assistant_message(
+            conversation_id, request, chunks, answer, corpus_epoch, shared=shared is not None, error=error
+        )
+        if error is None:
+            yield _sse("done", {"message_id": message_id})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/conversations/{conversation_id}", response_model=ConversationMessagesOut)
-def get_conversation(conversation_id: str):
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
+async def get_conversation(conversation_id: str):
+    await wait_for_pending_writes()
+    async with get_async_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
                 "SELECT id, role, content, created_at FROM messages WHERE conversation_id = %s ORDER BY created_at",
                 (conversation_id,),
             )
-            messages = cur.fetchall()
+            messages = await cur.fetchall()
     return {"conversation_id": conversation_id, "messages": messages}
 
 
 @router.post("/feedback")
-def create_feedback(request: FeedbackCreateRequest):
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
+async def create_feedback(request: FeedbackCreateRequest):
+    # The referenced message may still be queued for write-behind.
+    await wait_for_pending_writes()
+    async with get_async_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
                 """
                 INSERT INTO feedback (conversation_id, message_id, rating, flags, notes)
                 VALUES (%s, %s, %s, %s, %s)
@@ -125,5 +290,5 @@ def create_feedback(request: FeedbackCreateRequest):
                     request.notes,
                 ),
             )
-        conn.commit()
+        await conn.commit()
     return {"status": "ok"}
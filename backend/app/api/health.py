@@ -1,11 +1,44 @@
 ﻿# backend/app/api/health.py
 from __future__ import annotations
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
+
+from app.db import pool_stats
+from app.services.answer_cache import answer_cache_stats
+from app.services.coalescing import coalescing_stats
+from app.services.corpus import corpus_epoch_stats
+from app.services.embeddings import embedding_batcher_stats, embedding_cache_stats
+from app.services.model_client import model_client_stats
+from app.services.persistence import write_behind_stats
+from app.services.reranker import rerank_batcher_stats, rerank_cache_stats
+from app.services.warmup import readiness
 
 router = APIRouter()
 
 
 @router.get("/health")
 def health_check() -> dict:
-    return {"status": "ok", "version": "0.1.0"}
+    return {
+        "status": "ok",
+        "version": "0.1.0",
+        "db_pool": pool_stats(),
+        "corpus": corpus_epoch_stats(),
+        "embedding_cache": embedding_cache_stats(),
+        "rerank_cache": rerank_cache_stats(),
+        "answer_cache": answer_cache_stats(),
+        "coalescing": coalescing_stats(),
+        "batchers": {"embed": embedding_batcher_stats(), "rerank": rerank_batcher_stats()},
+        "write_behind": write_behind_stats(),
+        "models": readiness()[1],
+        "model_server": model_client_stats(),
+    }
+
+
+@router.get("/health/ready")
+def readiness_check(response: Response) -> dict:
+    # For the orchestrator's readiness probe: 503 until every model is loaded
+    # and has run a forward pass.
+    ready, models = readiness()
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if ready else "warming", "models": models}
@@ -0,0 +1,14 @@
+﻿# backend/app/api/metrics.py
+from __future__ import annotations
+
+from fastapi import APIRouter, Response
+
+from app.metrics import render
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
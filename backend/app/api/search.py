@@ -1,17 +1,57 @@
 ﻿# backend/app/api/search.py
 from __future__ import annotations
 
-from fastapi import APIRouter
+import json
 
+from fastapi import APIRouter, Header, Response
+
+from app.config import settings
 from app.schemas import SearchRequest, SearchResponse
+from app.services.cache import cache_key, normalize_query
+from app.services.coalescing import coalesced, flight_key
+from app.services.corpus import current_epoch
 from app.services.retrieval import retrieve_chunks
 
 router = APIRouter(tags=["search"])
 
 
-@router.post("/search", response_model=SearchResponse)
-def search(request: SearchRequest):
-    chunks = retrieve_chunks(
+def _search_etag(request: SearchRequest, corpus_epoch: int) -> str:
+    # Identical requests against the same corpus epoch and retrieval settings
+    # return the same chunks.
+    digest = cache_key(
+        "search",
+        str(corpus_epoch),
+        settings.embeddings_model,
+        settings.vector_index,
+        request.model_dump_json(),
+    ).split(":", 1)[1]
+    return f'"{corpus_epoch}-{digest[:32]}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip().removeprefix("W/") for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _search_flight_key(request: SearchRequest, corpus_epoch: int) -> str:
+    return flight_key(
+        "search",
+        str(corpus_epoch),
+        settings.embeddings_model,
+        settings.vector_index,
+        normalize_query(request.query),
+        request.model_dump_json(exclude={"query"}),
+    )
+
+
+def _dump_chunks(chunks: list[dict]) -> str:
+    return json.dumps(chunks, default=str)
+
+
+async def _search_chunks(request: SearchRequest) -> list[dict]:
+    chunks = await retrieve_chunks(
         query=request.query,
         top_k=request.top_k,
         institution=request.institution,
@@ -20,6 +60,7 @@ def search(request: SearchRequest):
         effective_date_start=request.effective_date_start,
         effective_date_end=request.effective_date_end,
         active_only=request.active_only,
+        mode=request.retrieval_mode,
     )
 
     response_chunks = []
@@ -39,4 +80,21 @@ def search(request: SearchRequest):
             }
         )
 
+    return response_chunks
+
+
+@router.post("/search", response_model=SearchResponse)
+async def search(request: SearchRequest, response: Response, if_none_match: str | None = Header(default=None)):
+    corpus_epoch = await current_epoch()
+    etag = _search_etag(request, corpus_epoch)
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    # Identical searches arriving together share one embedding and query.
+    async with coalesced(_search_flight_key(request, corpus_epoch), _dump_chunks, json.loads) as flight:
+        response_chunks = await flight.shared()
+        if response_chunks is None:
+            response_chunks = await _search_chunks(request)
+            flight.set_result(response_chunks)
     return {"chunks": response_chunks}
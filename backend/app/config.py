@@ -1,6 +1,8 @@
 ﻿# backend/app/config.py
 from __future__ import annotations
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,11 +14,69 @@ class Settings(BaseSettings):
     embeddings_model: str
     reranker_model: str | None = None
     reranker_top_n: int = 5
+    reranker_backend: Literal["torch", "int8", "onnx"] = "torch"
+    # Cross-encoder limit in tokens, and the word budget passages are cut to
+    # before tokenization (kept above the token limit's word equivalent so the
+    # model's own cut still decides).
+    reranker_max_length: int = 256
+    reranker_passage_max_words: int = 256
+    reranker_batch_size: int = 16
+    reranker_cache_size: int = 20000
     llm_provider: str
     llm_model: str
     llm_api_key: str
     admin_token: str
     min_similarity_score: float = 0.2
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 10
+    db_pool_max_lifetime: float = 3600.0
+    db_pool_max_idle: float = 600.0
+    db_pool_timeout: float = 30.0
+    embedding_cache_size: int = 4096
+    embedding_cache_ttl_seconds: float = 86400.0
+    embedding_cache_redis: bool = True
+    llm_timeout_seconds: float = 30.0
+    llm_connect_timeout_seconds: float = 5.0
+    llm_max_connections: int = 200
+    llm_max_keepalive_connections: int = 50
+    model_executor_workers: int = 4
+    embed_batch_max_size: int = 32
+    embed_batch_max_wait_ms: float = 5.0
+    rerank_batch_max_size: int = 64
+    rerank_batch_max_wait_ms: float = 5.0
+    hybrid_candidates: int = 40
+    hybrid_rrf_k: int = 60
+    hnsw_ef_search: int = 100
+    hnsw_iterative_scan: str = "relaxed_order"
+    hnsw_max_scan_tuples: int = 20000
+    # Bounds only the exact-scan fallback for selective filters.
+    retrieval_statement_timeout_ms: int = 2000
+    # ANN index used for the first pass; halfvec and binary need the matching
+    # index from scripts/set_vector_index.py, built for embedding_dim.
+    vector_index: Literal["vector", "halfvec", "binary"] = "vector"
+    vector_rescore_factor: int = 4
+    embedding_dim: int = 384
+    answer_cache_enabled: bool = True
+    answer_cache_similarity: float = 0.95
+    answer_cache_ttl_seconds: float = 86400.0
+    corpus_epoch_ttl_seconds: float = 5.0
+    write_behind_enabled: bool = False
+    write_behind_queue_size: int = 1000
+    write_behind_batch_size: int = 100
+    write_behind_flush_interval_ms: float = 50.0
+    bulk_import_batch_size: int = 100
+    # Load and run the models once at startup; /health/ready waits for it.
+    model_warmup: bool = True
+    # Path of the app.model_server Unix socket. Empty keeps the models in
+    # every API process.
+    model_server_socket: str = ""
+    model_server_timeout_seconds: float = 10.0
+    model_server_max_idle: int = 16
+    coalesce_enabled: bool = True
+    # Must outlive the slowest leader, or a second process starts computing.
+    coalesce_lock_ttl_seconds: float = 60.0
+    coalesce_wait_seconds: float = 35.0
+    coalesce_result_ttl_seconds: float = 10.0
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,10 +1,14 @@
 ﻿# backend/app/db.py
 from __future__ import annotations
 
-from contextlib import contextmanager
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
 
 import psycopg
+from pgvector.psycopg import register_vector, register_vector_async
 from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 
 from app.config import settings
 
@@ -15,10 +19,89 @@ def _normalize_dsn(dsn: str) -> str:
     return dsn
 
 
+def _configure(conn: psycopg.Connection) -> None:
+    register_vector(conn)
+    conn.commit()
+
+
+async def _configure_async(conn: psycopg.AsyncConnection) -> None:
+    await register_vector_async(conn)
+    await conn.commit()
+
+
+def _pool_kwargs() -> dict:
+    return {
+        "conninfo": _normalize_dsn(settings.database_url),
+        "kwargs": {"row_factory": dict_row},
+        "min_size": settings.db_pool_min_size,
+        "max_size": settings.db_pool_max_size,
+        "max_lifetime": settings.db_pool_max_lifetime,
+        "max_idle": settings.db_pool_max_idle,
+        "timeout": settings.db_pool_timeout,
+        "open": False,
+    }
+
+
+@lru_cache(maxsize=1)
+def get_pool() -> ConnectionPool:
+    pool = ConnectionPool(
+        configure=_configure,
+        check=ConnectionPool.check_connection,
+        name="backend-sync",
+        **_pool_kwargs(),
+    )
+    pool.open()
+    return pool
+
+
+_async_pool: AsyncConnectionPool | None = None
+_async_pool_lock = asyncio.Lock()
+
+
+async def open_async_pool() -> AsyncConnectionPool:
+    global _async_pool
+    if _async_pool is not None:
+        return _async_pool
+    async with _async_pool_lock:
+        if _async_pool is None:
+            pool = AsyncConnectionPool(
+                configure=_configure_async,
+                check=AsyncConnectionPool.check_connection,
+                name="backend-async",
+                **_pool_kwargs(),
+            )
+            await pool.open()
+            _async_pool = pool
+    return _async_pool
+
+
+async def close_pools() -> None:
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+    if get_pool.cache_info().currsize:
+        get_pool().close()
+        get_pool.cache_clear()
+
+
+def pool_stats() -> dict[str, dict[str, int]]:
+    stats = {}
+    if get_pool.cache_info().currsize:
+        stats["sync"] = get_pool().get_stats()
+    if _async_pool is not None:
+        stats["async"] = _async_pool.get_stats()
+    return stats
+
+
 @contextmanager
 def get_conn():
-    conn = psycopg.connect(_normalize_dsn(settings.database_url), row_factory=dict_row)
-    try:
+    with get_pool().connection() as conn:
+        yield conn
+
+
+@asynccontextmanager
+async def get_async_conn():
+    pool = await open_async_pool()
+    async with pool.connection() as conn:
         yield conn
-    finally:
-        conn.close()
@@ -1,15 +1,64 @@
 ﻿# backend/app/main.py
 from __future__ import annotations
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Request
+
+from app import metrics
 from app.api.admin import router as admin_router
 from app.api.chat import router as chat_router
 from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
 from app.api.search import router as search_router
+from app.db import close_pools, get_pool, open_async_pool
+from app.services.corpus import start_epoch_listener, stop_epoch_listener
+from app.services.embeddings import close_batcher as close_embed_batcher
+from app.services.executor import shutdown_model_executor
+from app.services.llm import close_client
+from app.services.model_client import close_model_client
+from app.services.persistence import close_write_behind, start_write_behind
+from app.services.reranker import close_batcher as close_rerank_batcher
+from app.services.timing import start_request_timings
+from app.services.warmup import start_warmup, stop_warmup
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    metrics.install()
+    get_pool()
+    await open_async_pool()
+    start_epoch_listener()
+    start_write_behind()
+    start_warmup()
+    yield
+    await stop_warmup()
+    await close_write_behind()
+    await stop_epoch_listener()
+    await close_client()
+    close_model_client()
+    close_embed_batcher()
+    close_rerank_batcher()
+    shutdown_model_executor()
+    await close_pools()
+
+
+app = FastAPI(title="Student Rights Copilot", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    timings = start_request_timings()
+    response = await call_next(request)
+    # Streaming responses only report the stages finished before the first byte.
+    response.headers["Server-Timing"] = timings.server_timing()
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.observe_request(request.method, route, response.status_code, timings.elapsed())
+    return response
+
 
-app = FastAPI(title="Student Rights Copilot")
 app.include_router(health_router)
+app.include_router(metrics_router)
 app.include_router(admin_router)
 app.include_router(search_router)
 app.include_router(chat_router)
@@ -0,0 +1,38 @@
+﻿# backend/app/metrics.py
+from __future__ import annotations
+
+from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+
+from app.services.timing import add_stage_observer
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = Histogram(
+    "studenthelper_stage_duration_seconds",
+    "Time spent in each stage of the request hot path.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+REQUEST_SECONDS = Histogram(
+    "studenthelper_request_duration_seconds",
+    "End-to-end HTTP request latency, measured until the response starts.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(name).observe(seconds)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+
+
+def install() -> None:
+    add_stage_observer(observe_stage)
+
+
+def render() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
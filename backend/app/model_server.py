@@ -0,0 +1,91 @@
+﻿# backend/app/model_server.py
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+
+from app.config import settings
+from app.services import embeddings, reranker
+from app.services.executor import run_in_model_executor, shutdown_model_executor
+from app.services.model_protocol import ModelServerError, read_message, write_message
+
+# Hosts the embeddings model and the reranker for every API process on the
+# host: run `python -m app.model_server` and set MODEL_SERVER_SOCKET for the
+# API. Requests from all processes meet in this process's micro-batchers.
+
+logger = logging.getLogger("app.model_server")
+
+_models: dict[str, dict[str, float]] = {}
+
+
+async def _dispatch(request: dict) -> tuple[dict, bytes]:
+    op = request.get("op")
+    if op == "embed":
+        vectors = await embeddings.encode_local(request["texts"])
+        return {"ok": True, "shape": list(vectors.shape)}, vectors.tobytes()
+    if op == "rerank":
+        if not settings.reranker_model:
+            raise ModelServerError("no reranker model configured")
+        scores = await reranker.score_local([tuple(pair) for pair in request["pairs"]])
+        return {"ok": True, "scores": scores}, b""
+    if op == "status":
+        return {"ok": True, "models": _models}, b""
+    raise ModelServerError(f"unknown op: {op}")
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while (message := await read_message(reader)) is not None:
+            request, _ = message
+            try:
+                response, payload = await _dispatch(request)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("model server request failed")
+                response, payload = {"ok": False, "error": str(exc)}, b""
+            await write_message(writer, response, payload)
+    except (ConnectionError, ModelServerError, asyncio.IncompleteReadError) as exc:
+        logger.warning("dropping model server connection: %s", exc)
+    finally:
+        writer.close()
+
+
+async def serve() -> None:
+    # Warm first and only then bind, so a connectable socket means ready.
+    _models["embeddings"] = await run_in_model_executor(embeddings.warm_up)
+    if settings.reranker_model:
+        _models["reranker"] = await run_in_model_executor(reranker.warm_up)
+    logger.info("models ready: %s", _models)
+
+    path = settings.model_server_socket
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(_handle, path=path)
+    logger.info("model server listening on %s", path)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    async with server:
+        await stop.wait()
+    embeddings.close_batcher()
+    reranker.close_batcher()
+    shutdown_model_executor()
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO)
+    if not settings.model_server_socket:
+        logger.error("MODEL_SERVER_SOCKET is not set")
+        return 1
+    asyncio.run(serve())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,10 @@
+﻿# backend/app/redis_client.py
+from __future__ import annotations
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from app.config import settings
+
+redis_client = Redis.from_url(settings.redis_url)
+async_redis_client = AsyncRedis.from_url(settings.redis_url)
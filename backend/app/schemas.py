@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Any
+from typing import Any, Literal
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -36,6 +36,10 @@ class IngestionJobOut(BaseModel):
     document_version_id: UUID
     status: str
     error_message: str | None = None
+    chunks_total: int | None = None
+    chunks_reused: int | None = None
+    reuse_ratio: float | None = None
+    stage_timings: dict[str, float] | None = None
 
 
 class SearchRequest(BaseModel):
@@ -47,6 +51,7 @@ class SearchRequest(BaseModel):
     effective_date_start: date | None = None
     effective_date_end: date | None = None
     active_only: bool = True
+    retrieval_mode: Literal["vector", "hybrid"] = "vector"
 
 
 class ChunkOut(BaseModel):
@@ -78,6 +83,7 @@ class MessageCreateRequest(BaseModel):
     effective_date_start: date | None = None
     effective_date_end: date | None = None
     top_k: int = 8
+    retrieval_mode: Literal["vector", "hybrid"] = "vector"
 
 
 class CitationOut(BaseModel):
@@ -0,0 +1,121 @@
+﻿# backend/app/services/answer_cache.py
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+
+import numpy as np
+from pgvector.psycopg import Vector
+from psycopg.types.json import Jsonb
+
+from app.config import settings
+from app.db import get_async_conn
+from app.schemas import AnswerOut, MessageCreateRequest
+from app.services.cache import cache_key
+from app.services.embeddings import embed_text
+from app.services.timing import stage
+
+LOOKUP_SQL = """
+    SELECT answer, chunks, query_vector <=> %(vector)s AS distance
+    FROM answer_cache
+    WHERE filters_key = %(filters_key)s
+      AND corpus_key = %(corpus_key)s
+      AND created_at > NOW() - make_interval(secs => %(ttl)s)
+    ORDER BY query_vector <=> %(vector)s
+    LIMIT 1
+"""
+
+STORE_SQL = """
+    INSERT INTO answer_cache (query_vector, filters_key, corpus_key, answer, chunks)
+    VALUES (%(vector)s, %(filters_key)s, %(corpus_key)s, %(answer)s, %(chunks)s)
+"""
+
+# Rows from earlier epochs can never match again. Only strictly older epochs
+# go, so a process whose cached epoch lags behind cannot delete newer rows.
+EXPIRE_SQL = """
+    DELETE FROM answer_cache
+    WHERE corpus_key::BIGINT < %(corpus_key)s::BIGINT
+       OR (
+            filters_key = %(filters_key)s
+            AND corpus_key = %(corpus_key)s
+            AND created_at <= NOW() - make_interval(secs => %(ttl)s)
+       )
+"""
+
+_counters = {"hits": 0, "misses": 0, "stores": 0}
+
+
+@dataclass(frozen=True)
+class AnswerCacheScope:
+    vector: np.ndarray
+    filters_key: str
+    corpus_key: str
+
+    def params(self) -> dict[str, object]:
+        return {
+            "vector": Vector(self.vector),
+            "filters_key": self.filters_key,
+            "corpus_key": self.corpus_key,
+            "ttl": settings.answer_cache_ttl_seconds,
+        }
+
+
+def filters_key(request: MessageCreateRequest) -> str:
+    # Everything besides the question text that changes which chunks are
+    # retrieved or how the answer is written.
+    parts = {
+        "institution": request.institution,
+        "language": request.language,
+        "categories": sorted(request.categories) if request.categories else None,
+        "effective_date_start": request.effective_date_start,
+        "effective_date_end": request.effective_date_end,
+        "top_k": request.top_k,
+        "retrieval_mode": request.retrieval_mode,
+        "embeddings_model": settings.embeddings_model,
+        "reranker_model": settings.reranker_model,
+        "llm": [settings.llm_provider, settings.llm_model],
+    }
+    return cache_key("answer-filters", json.dumps(parts, sort_keys=True, default=str))
+
+
+async def lookup_answer(
+    request: MessageCreateRequest,
+    corpus_epoch: int,
+) -> tuple[AnswerCacheScope, tuple[dict, list[dict]] | None]:
+    # The corpus epoch changes whenever retrieval could see different chunks,
+    # which moves every lookup to a fresh scope.
+    scope = AnswerCacheScope(await embed_text(request.content), filters_key(request), str(corpus_epoch))
+    with stage("answer_cache"):
+        async with get_async_conn() as conn:
+            cur = await conn.execute(LOOKUP_SQL, scope.params())
+            row = await cur.fetchone()
+
+    if row is None or float(row["distance"]) > 1.0 - settings.answer_cache_similarity:
+        _counters["misses"] += 1
+        return scope, None
+    _counters["hits"] += 1
+    return scope, (row["answer"], row["chunks"])
+
+
+async def store_answer(scope: AnswerCacheScope, answer: dict, chunks: list[dict]) -> None:
+    # Abstentions are either cheap (no relevant chunks) or the result of a
+    # provider/validation failure that should not be replayed.
+    if answer["confidence"] == "abstain":
+        return
+    trace_chunks = [
+        {"chunk_id": chunk["chunk_id"], "score": chunk["score"], "rerank_score": chunk.get("rerank_score")}
+        for chunk in chunks
+    ]
+    params = scope.params()
+    params["answer"] = Jsonb(AnswerOut.model_validate(answer).model_dump(mode="json"))
+    params["chunks"] = Jsonb(trace_chunks)
+    with stage("answer_cache"):
+        async with get_async_conn() as conn:
+            async with conn.transaction():
+                await conn.execute(EXPIRE_SQL, params)
+                await conn.execute(STORE_SQL, params)
+    _counters["stores"] += 1
+
+
+def answer_cache_stats() -> dict[str, int]:
+    return dict(_counters)
@@ -2,12 +2,15 @@
 from __future__ import annotations
 
 import json
+from typing import Any, AsyncIterator
 
 from pydantic import ValidationError
 
 from app.config import settings
-from app.services.llm import call_llm
-from app.services.llm_schema import StructuredAnswer
+from app.services.llm import call_llm, stream_llm
+from app.services.llm_schema import Claim, StructuredAnswer
+from app.services.stream_parser import AnswerStreamParser
+from app.services.timing import stage
 from app.services.validation import validate_claims
 
 
@@ -46,14 +49,19 @@ def _build_llm_prompt(chunks: list[dict]) -> tuple[str, str]:
     return system_prompt, user_prompt
 
 
-def build_structured_answer(chunks: list[dict]) -> dict:
-    system_prompt, user_prompt = _build_llm_prompt(chunks)
-    raw = call_llm(system_prompt, user_prompt)
+def parse_structured_answer(raw: str) -> dict:
     parsed = json.loads(raw)
     structured = StructuredAnswer.model_validate(parsed)
     return structured.model_dump()
 
 
+async def build_structured_answer(chunks: list[dict]) -> dict:
+    system_prompt, user_prompt = _build_llm_prompt(chunks)
+    with stage("llm"):
+        raw = await call_llm(system_prompt, user_prompt)
+    return parse_structured_answer(raw)
+
+
 def render_answer(structured: dict, citations: list[dict]) -> dict:
     claims = structured.get("claims", [])
     summary = ""
@@ -106,27 +114,21 @@ def render_answer(structured: dict, citations: list[dict]) -> dict:
     }
 
 
-def generate_answer(chunks: list[dict]) -> dict:
-    try:
-        structured = build_structured_answer(chunks)
-    except (json.JSONDecodeError, ValidationError, ValueError) as exc:
-        structured = {
-            "claims": [],
-            "steps": None,
-            "confidence": "abstain",
-            "follow_up_questions": None,
-            "error": str(exc),
-        }
+def _abstain_structure(error: str | None) -> dict:
+    return {
+        "claims": [],
+        "steps": None,
+        "confidence": "abstain",
+        "follow_up_questions": None,
+        "error": error,
+    }
+
+
+def finalize_answer(chunks: list[dict], structured: dict) -> dict:
     allowed_ids = [chunk["chunk_id"] for chunk in chunks]
     ok, error = validate_claims(structured.get("claims", []), allowed_ids)
     if not ok:
-        structured = {
-            "claims": [],
-            "steps": None,
-            "confidence": "abstain",
-            "follow_up_questions": None,
-            "error": error,
-        }
+        structured = _abstain_structure(error)
 
     citations = []
     for chunk in chunks:
@@ -147,6 +149,42 @@ def generate_answer(chunks: list[dict]) -> dict:
     return render_answer(structured, citations)
 
 
+async def generate_answer(chunks: list[dict]) -> dict:
+    try:
+        structured = await build_structured_answer(chunks)
+    except (json.JSONDecodeError, ValidationError, ValueError) as exc:
+        structured = _abstain_structure(str(exc))
+    return finalize_answer(chunks, structured)
+
+
+async def stream_answer(chunks: list[dict]) -> AsyncIterator[tuple[str, Any]]:
+    system_prompt, user_prompt = _build_llm_prompt(chunks)
+    allowed_ids = [chunk["chunk_id"] for chunk in chunks]
+    parser = AnswerStreamParser()
+    # Includes the time the caller takes to forward each event, which is
+    # small next to token generation.
+    with stage("llm"):
+        async for delta in stream_llm(system_prompt, user_prompt):
+            for event, value in parser.feed(delta):
+                if event == "claim":
+                    try:
+                        claim = Claim.model_validate(value).model_dump()
+                    except ValidationError:
+                        continue
+                    ok, _ = validate_claims([claim], allowed_ids)
+                    if not ok:
+                        continue
+                    yield "claim", claim
+                elif isinstance(value, str):
+                    yield event, value
+
+    try:
+        structured = parse_structured_answer(parser.text)
+    except (json.JSONDecodeError, ValidationError, ValueError) as exc:
+        structured = _abstain_structure(str(exc))
+    yield "answer", finalize_answer(chunks, structured)
+
+
 def has_min_relevance(chunks: list[dict]) -> bool:
     if not chunks:
         return False
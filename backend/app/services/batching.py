@@ -0,0 +1,116 @@
+﻿# backend/app/services/batching.py
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from queue import Empty, Queue
+from typing import Callable, Generic, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_STOP = object()
+
+
+class MicroBatcher(Generic[T, R]):
+    # Collects items submitted from any thread for up to max_wait_ms (or until
+    # max_batch_size items are pending), runs func once over the whole batch on
+    # a single background thread and resolves each caller's future.
+    def __init__(
+        self,
+        func: Callable[[list[T]], Sequence[R]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        name: str = "micro-batcher",
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.func = func
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000.0
+        self.name = name
+        self._queue: Queue = Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._batches = 0
+        self._items = 0
+        self._sizes: Counter[int] = Counter()
+
+    def submit(self, item: T) -> Future[R]:
+        return self.submit_many([item])[0]
+
+    def submit_many(self, items: Sequence[T]) -> list[Future[R]]:
+        futures: list[Future[R]] = []
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            for item in items:
+                future: Future[R] = Future()
+                self._queue.put((item, future))
+                futures.append(future)
+        return futures
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000.0,
+            "batch_sizes": dict(sorted(self._sizes.items())),
+        }
+
+    def _collect(self, first: tuple[T, Future[R]]) -> tuple[list[tuple[T, Future[R]]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            entry = self._queue.get()
+            if entry is _STOP:
+                break
+            batch, stopping = self._collect(entry)
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            self._batches += 1
+            self._items += len(batch)
+            self._sizes[len(batch)] += 1
+            try:
+                results = self.func([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name} returned {len(results)} results for {len(batch)} items")
+            except BaseException as exc:  # noqa: BLE001
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,94 @@
+﻿# backend/app/services/bulk_import.py
+from __future__ import annotations
+
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import date
+
+MANIFEST_NAME = "manifest.csv"
+REQUIRED_COLUMNS = ("file", "title", "version_label")
+LIST_SEPARATOR = ";"
+
+
+@dataclass(frozen=True)
+class ManifestRow:
+    line: int
+    file: str
+    title: str
+    version_label: str
+    institution: str | None = None
+    source_type: str | None = None
+    effective_date: date | None = None
+    published_date: date | None = None
+    revision_date: date | None = None
+    language: str | None = None
+    categories: list[str] | None = field(default=None, hash=False)
+    tags: list[str] | None = field(default=None, hash=False)
+    trust_level: str | None = None
+    source_uri: str | None = None
+
+
+def _text(value: str | None) -> str | None:
+    value = (value or "").strip()
+    return value or None
+
+
+def _list(value: str | None) -> list[str] | None:
+    items = [item.strip() for item in (value or "").split(LIST_SEPARATOR) if item.strip()]
+    return items or None
+
+
+def _date(value: str | None, column: str, line: int, errors: list[str]) -> date | None:
+    value = _text(value)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        errors.append(f"line {line}: {column} must be YYYY-MM-DD, got {value!r}")
+        return None
+
+
+def parse_manifest(text: str, default_institution: str | None = None) -> tuple[list[ManifestRow], list[str]]:
+    # One row per document. List columns (categories, tags) are separated by
+    # ";". Returns every problem found rather than stopping at the first.
+    reader = csv.DictReader(io.StringIO(text.lstrip("\ufeff")))
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        return [], [f"manifest is missing columns: {', '.join(missing)}"]
+
+    rows: list[ManifestRow] = []
+    errors: list[str] = []
+    seen_files: set[str] = set()
+    for line, record in enumerate(reader, start=2):
+        values = {column: _text(record.get(column)) for column in REQUIRED_COLUMNS}
+        empty = [column for column, value in values.items() if value is None]
+        if empty:
+            errors.append(f"line {line}: {', '.join(empty)} required")
+            continue
+        if values["file"] in seen_files:
+            errors.append(f"line {line}: {values['file']} listed more than once")
+            continue
+        seen_files.add(values["file"])
+        rows.append(
+            ManifestRow(
+                line=line,
+                file=values["file"],
+                title=values["title"],
+                version_label=values["version_label"],
+                institution=_text(record.get("institution")) or default_institution,
+                source_type=_text(record.get("source_type")),
+                effective_date=_date(record.get("effective_date"), "effective_date", line, errors),
+                published_date=_date(record.get("published_date"), "published_date", line, errors),
+                revision_date=_date(record.get("revision_date"), "revision_date", line, errors),
+                language=_text(record.get("language")),
+                categories=_list(record.get("categories")),
+                tags=_list(record.get("tags")),
+                trust_level=_text(record.get("trust_level")),
+                source_uri=_text(record.get("source_uri")),
+            )
+        )
+    if not rows and not errors:
+        errors.append("manifest has no documents")
+    return rows, errors
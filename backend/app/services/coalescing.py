@@ -0,0 +1,159 @@
+﻿# backend/app/services/coalescing.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Generic, TypeVar
+from uuid import uuid4
+
+from redis import RedisError
+
+from app.config import settings
+from app.redis_client import async_redis_client
+from app.services.cache import cache_key
+from app.services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Deletes the lock only if this leader still holds it.
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Leads without cross-process coordination (Redis unavailable).
+_LOCAL_ONLY = ""
+
+_flights: SingleFlight[object | None] = SingleFlight()
+_counters = {"leaders": 0, "local_followers": 0, "remote_followers": 0, "fallbacks": 0, "errors": 0}
+
+
+def flight_key(namespace: str, *parts: str) -> str:
+    return cache_key(f"flight:{namespace}", *parts)
+
+
+def _lock_key(key: str) -> str:
+    return f"{key}:lock"
+
+
+def _result_key(key: str) -> str:
+    return f"{key}:result"
+
+
+class Flight(Generic[T]):
+    def __init__(self, loads: Callable[[bytes], T]) -> None:
+        self.leader = True
+        self._loads = loads
+        self._local: asyncio.Future | None = None
+        self._remote_key: str | None = None
+        self._result: T | None = None
+
+    async def shared(self) -> T | None:
+        # The result computed by the leader, or None when this caller is the
+        # leader or the leader failed, in which case the caller computes it.
+        if self._local is not None:
+            result = await asyncio.shield(self._local)
+        elif self._remote_key is not None:
+            result = await _await_remote(self._remote_key, self._loads)
+            # Local followers of this caller get the remote result as well.
+            self._result = result
+        else:
+            return None
+        if result is None:
+            _counters["fallbacks"] += 1
+        return result
+
+    def set_result(self, result: T) -> None:
+        self._result = result
+
+
+async def _acquire(key: str) -> str | None:
+    token = uuid4().hex
+    try:
+        acquired = await async_redis_client.set(
+            _lock_key(key), token, nx=True, px=int(settings.coalesce_lock_ttl_seconds * 1000)
+        )
+    except RedisError:
+        _counters["errors"] += 1
+        return _LOCAL_ONLY
+    return token if acquired else None
+
+
+async def _publish(key: str, token: str, payload: str) -> None:
+    # The result key covers followers that subscribe after the publish; an
+    # empty payload tells them the leader failed.
+    try:
+        if payload:
+            await async_redis_client.set(
+                _result_key(key), payload, px=int(settings.coalesce_result_ttl_seconds * 1000)
+            )
+        await async_redis_client.publish(key, payload)
+        await async_redis_client.eval(RELEASE_LOCK_SCRIPT, 1, _lock_key(key), token)
+    except RedisError:
+        _counters["errors"] += 1
+        logger.warning("could not publish coalesced result for %s", key)
+
+
+async def _await_remote(key: str, loads: Callable[[bytes], T]) -> T | None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.coalesce_wait_seconds
+    try:
+        async with async_redis_client.pubsub() as pubsub:
+            await pubsub.subscribe(key)
+            payload = await async_redis_client.get(_result_key(key))
+            if payload is None and not await async_redis_client.exists(_lock_key(key)):
+                # The leader finished without a result before we subscribed.
+                return None
+            while payload is None and (remaining := deadline - loop.time()) > 0:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+                if message is not None:
+                    payload = message["data"]
+    except RedisError:
+        _counters["errors"] += 1
+        return None
+    return loads(payload) if payload else None
+
+
+@asynccontextmanager
+async def coalesced(key: str, dumps: Callable[[T], str], loads: Callable[[bytes], T]) -> AsyncIterator[Flight[T]]:
+    # Identical requests share one computation: within the process through
+    # SingleFlight, across processes through a Redis lock plus a result
+    # channel. Callers ask flight.shared() first and, if it returns None,
+    # compute and hand the result to flight.set_result().
+    flight: Flight[T] = Flight(loads)
+    if not settings.coalesce_enabled:
+        yield flight
+        return
+
+    local = _flights.join(key)
+    if local is not None:
+        _counters["local_followers"] += 1
+        flight.leader = False
+        flight._local = local
+        yield flight
+        return
+
+    owned = _flights.claim(key)
+    token = None
+    try:
+        token = await _acquire(key)
+        if token is None:
+            _counters["remote_followers"] += 1
+            flight.leader = False
+            flight._remote_key = key
+        else:
+            _counters["leaders"] += 1
+        yield flight
+    finally:
+        owned.set_result(flight._result)
+        if token:
+            await _publish(key, token, dumps(flight._result) if flight._result is not None else "")
+
+
+def coalescing_stats() -> dict:
+    return {**_counters, **_flights.stats()}
@@ -0,0 +1,106 @@
+﻿# backend/app/services/corpus.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+import psycopg
+from redis import RedisError
+
+from app.config import settings
+from app.db import get_async_conn
+from app.redis_client import async_redis_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+CORPUS_EPOCH_CHANNEL = "corpus:epoch"
+
+READ_EPOCH_SQL = "SELECT epoch FROM corpus_state"
+BUMP_EPOCH_SQL = "UPDATE corpus_state SET epoch = epoch + 1, updated_at = NOW() RETURNING epoch"
+# Cached answers are scoped to the corpus epoch, so entries from earlier epochs
+# can never match again.
+INVALIDATE_ANSWERS_SQL = "DELETE FROM answer_cache WHERE corpus_key::BIGINT < %s"
+
+# Latest epoch seen by this process, from the database or the pub/sub channel.
+# Epochs only grow, so concurrent updates keep the larger value.
+_state: dict[str, float | int | None] = {"epoch": None, "checked_at": 0.0}
+_listener: asyncio.Task | None = None
+
+
+def _observe(epoch: int) -> None:
+    current = _state["epoch"]
+    _state["epoch"] = epoch if current is None else max(int(current), epoch)
+    _state["checked_at"] = time.monotonic()
+
+
+async def current_epoch() -> int:
+    epoch = _state["epoch"]
+    if epoch is not None and time.monotonic() - float(_state["checked_at"]) < settings.corpus_epoch_ttl_seconds:
+        return int(epoch)
+    async with get_async_conn() as conn:
+        cur = await conn.execute(READ_EPOCH_SQL)
+        row = await cur.fetchone()
+    _observe(row["epoch"] if row else 0)
+    return int(_state["epoch"])
+
+
+def bump_epoch(cur: psycopg.Cursor) -> int:
+    # Runs inside the caller's transaction; publish_epoch after the commit.
+    # Every change to what retrieval can see goes through here, so this is the
+    # one place the answer cache is invalidated.
+    cur.execute(BUMP_EPOCH_SQL)
+    epoch = cur.fetchone()["epoch"]
+    cur.execute(INVALIDATE_ANSWERS_SQL, (epoch,))
+    return epoch
+
+
+def publish_epoch(epoch: int) -> None:
+    _observe(epoch)
+    try:
+        redis_client.publish(CORPUS_EPOCH_CHANNEL, str(epoch))
+    except RedisError:
+        # Other processes pick the change up when their cached epoch expires.
+        logger.warning("could not publish corpus epoch %s", epoch)
+
+
+async def _listen() -> None:
+    while True:
+        try:
+            async with async_redis_client.pubsub() as pubsub:
+                await pubsub.subscribe(CORPUS_EPOCH_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        _observe(int(message["data"]))
+        except RedisError:
+            # Anything published while disconnected is missed, so fall back to
+            # a database read on the next request.
+            _state["checked_at"] = 0.0
+            await asyncio.sleep(settings.corpus_epoch_ttl_seconds)
+
+
+def start_epoch_listener() -> None:
+    global _listener
+    if _listener is None:
+        _listener = asyncio.create_task(_listen(), name="corpus-epoch-listener")
+
+
+async def stop_epoch_listener() -> None:
+    global _listener
+    if _listener is None:
+        return
+    _listener.cancel()
+    try:
+        await _listener
+    except asyncio.CancelledError:
+        pass
+    _listener = None
+
+
+def corpus_epoch_stats() -> dict:
+    checked_at = float(_state["checked_at"])
+    return {
+        "epoch": _state["epoch"],
+        "age_seconds": time.monotonic() - checked_at if checked_at else None,
+        "listener": _listener is not None and not _listener.done(),
+    }
@@ -0,0 +1,87 @@
+﻿# backend/app/services/dedup.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import psycopg
+
+# Latest version with the same file content whose ingestion completed and
+# produced vectors with the embeddings model in use.
+FIND_SOURCE_SQL = """
+    SELECT document_versions.id
+    FROM document_versions
+    JOIN ingestion_jobs ON ingestion_jobs.document_version_id = document_versions.id
+    WHERE document_versions.file_sha256 = %(sha256)s
+      AND document_versions.id <> %(version_id)s
+      AND ingestion_jobs.status = 'completed'
+      AND EXISTS (
+          SELECT 1 FROM embeddings
+          WHERE embeddings.document_version_id = document_versions.id
+            AND embeddings.model_name = %(model_name)s
+      )
+    ORDER BY ingestion_jobs.finished_at DESC
+    LIMIT 1
+"""
+
+# Copies chunks and embeddings in one statement. New chunk ids are drawn once
+# in the materialised CTE so both inserts agree on them; the denormalised
+# filter columns come from the new version, not the source.
+CLONE_VERSION_SQL = """
+    WITH source_chunks AS MATERIALIZED (
+        SELECT id AS source_id, gen_random_uuid() AS chunk_id,
+            chunk_index, page_start, page_end, section_path, text, excerpt, source_hash
+        FROM chunks
+        WHERE document_version_id = %(source_id)s
+    ),
+    inserted_chunks AS (
+        INSERT INTO chunks (
+            id, document_version_id, chunk_index, page_start, page_end, section_path, text, excerpt, source_hash
+        )
+        SELECT chunk_id, %(version_id)s, chunk_index, page_start, page_end, section_path, text, excerpt, source_hash
+        FROM source_chunks
+    ),
+    target AS (
+        SELECT
+            documents.institution,
+            document_versions.language,
+            document_versions.categories,
+            document_versions.effective_date,
+            document_versions.is_active
+        FROM document_versions
+        JOIN documents ON document_versions.document_id = documents.id
+        WHERE document_versions.id = %(version_id)s
+    )
+    INSERT INTO embeddings (
+        chunk_id, model_name, embedding_dim, vector, document_version_id,
+        institution, language, categories, effective_date, is_active
+    )
+    SELECT
+        source_chunks.chunk_id, embeddings.model_name, embeddings.embedding_dim, embeddings.vector,
+        %(version_id)s, target.institution, target.language, target.categories,
+        target.effective_date, target.is_active
+    FROM source_chunks
+    JOIN embeddings ON embeddings.chunk_id = source_chunks.source_id AND embeddings.model_name = %(model_name)s
+    CROSS JOIN target
+"""
+
+
+@dataclass(frozen=True)
+class VersionClone:
+    source_version_id: str
+    chunks: int
+
+
+def clone_identical_version(
+    cur: psycopg.Cursor,
+    version_id: str,
+    file_sha256: str,
+    model_name: str,
+) -> VersionClone | None:
+    # Runs inside the caller's transaction, after the new version row exists.
+    params = {"version_id": version_id, "sha256": file_sha256, "model_name": model_name}
+    cur.execute(FIND_SOURCE_SQL, params)
+    row = cur.fetchone()
+    if row is None:
+        return None
+    cur.execute(CLONE_VERSION_SQL, {**params, "source_id": row["id"]})
+    return VersionClone(source_version_id=str(row["id"]), chunks=cur.rowcount)
@@ -1,20 +1,134 @@
 ﻿# backend/app/services/embeddings.py
 from __future__ import annotations
 
+import asyncio
+import time
 from functools import lru_cache
+from typing import TYPE_CHECKING
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from redis import RedisError
 
 from app.config import settings
+from app.redis_client import async_redis_client
+from app.services.batching import MicroBatcher
+from app.services.cache import LRUCache, cache_key, normalize_query
+from app.services.executor import run_in_model_executor
+from app.services.model_client import get_model_client
+from app.services.timing import timed_stage
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+_local_cache: LRUCache[str, np.ndarray] = LRUCache(
+    settings.embedding_cache_size,
+    settings.embedding_cache_ttl_seconds,
+)
+_redis_counters = {"hits": 0, "misses": 0, "errors": 0}
 
 
 @lru_cache(maxsize=1)
 def _model() -> SentenceTransformer:
+    # Imported here so loading the API (and torch) stays cheap until the
+    # model is actually needed; see services/warmup.py.
+    from sentence_transformers import SentenceTransformer
+
     return SentenceTransformer(settings.embeddings_model)
 
 
-def embed_text(text: str) -> list[float]:
+def encode_batch(texts: list[str]) -> np.ndarray:
     model = _model()
-    vector = model.encode(text, normalize_embeddings=True)
-    return np.asarray(vector, dtype=float).tolist()
+    vectors = model.encode(texts, batch_size=len(texts), normalize_embeddings=True, show_progress_bar=False)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def warm_up() -> dict[str, float]:
+    start = time.perf_counter()
+    _model()
+    loaded = time.perf_counter()
+    encode_batch(["warm up"])
+    return {"load_ms": (loaded - start) * 1000.0, "forward_ms": (time.perf_counter() - loaded) * 1000.0}
+
+
+@lru_cache(maxsize=1)
+def _batcher() -> MicroBatcher[str, np.ndarray]:
+    return MicroBatcher(
+        encode_batch,
+        max_batch_size=settings.embed_batch_max_size,
+        max_wait_ms=settings.embed_batch_max_wait_ms,
+        name="embed-batcher",
+    )
+
+
+async def encode_local(texts: list[str]) -> np.ndarray:
+    if settings.embed_batch_max_size > 1:
+        futures = _batcher().submit_many(texts)
+        return np.stack(await asyncio.gather(*(asyncio.wrap_future(future) for future in futures)))
+    return await run_in_model_executor(encode_batch, texts)
+
+
+async def _encode(text: str) -> np.ndarray:
+    if settings.model_server_socket:
+        vectors = await get_model_client().embed([text])
+    else:
+        vectors = await encode_local([text])
+    return vectors[0]
+
+
+async def _redis_get(key: str) -> np.ndarray | None:
+    if not settings.embedding_cache_redis:
+        return None
+    try:
+        payload = await async_redis_client.get(key)
+    except RedisError:
+        _redis_counters["errors"] += 1
+        return None
+    if payload is None:
+        _redis_counters["misses"] += 1
+        return None
+    _redis_counters["hits"] += 1
+    return np.frombuffer(payload, dtype=np.float32)
+
+
+async def _redis_set(key: str, vector: np.ndarray) -> None:
+    if not settings.embedding_cache_redis:
+        return
+    try:
+        await async_redis_client.set(key, vector.tobytes(), ex=int(settings.embedding_cache_ttl_seconds))
+    except RedisError:
+        _redis_counters["errors"] += 1
+
+
+@timed_stage("embed")
+async def embed_text(text: str) -> np.ndarray:
+    # The normalised text only widens cache hits; the model sees ``text``.
+    key = cache_key("emb", settings.embeddings_model, normalize_query(text))
+
+    cached = _local_cache.get(key)
+    if cached is not None:
+        return cached
+
+    vector = await _redis_get(key)
+    if vector is None:
+        vector = await _encode(text)
+        await _redis_set(key, vector)
+
+    # Cached arrays are shared between requests, so they are frozen rather
+    # than copied on every hit.
+    vector = np.array(vector, dtype=np.float32)
+    vector.flags.writeable = False
+    _local_cache.set(key, vector)
+    return vector
+
+
+def close_batcher() -> None:
+    if _batcher.cache_info().currsize:
+        _batcher().close()
+
+
+def embedding_cache_stats() -> dict[str, dict[str, int]]:
+    return {"local": _local_cache.stats(), "redis": dict(_redis_counters)}
+
+
+def embedding_batcher_stats() -> dict:
+    return _batcher().stats() if _batcher.cache_info().currsize else {}
@@ -0,0 +1,24 @@
+﻿# backend/app/services/executor.py
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+# Model inference holds the GIL for long stretches, so it gets its own small
+# pool instead of sharing the event loop's default executor with I/O work.
+_executor = ThreadPoolExecutor(max_workers=settings.model_executor_workers, thread_name_prefix="model")
+
+
+async def run_in_model_executor(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+def shutdown_model_executor() -> None:
+    _executor.shutdown(wait=False, cancel_futures=True)
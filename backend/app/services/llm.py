@@ -3,19 +3,54 @@ from __future__ import annotations
 
 import json
 import os
-import urllib.request
+from typing import AsyncIterator
+
+import httpx
 
 from app.config import settings
 
+_client: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.llm_timeout_seconds, connect=settings.llm_connect_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
-def _post_json(url: str, headers: dict[str, str], payload: dict) -> dict:
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data, headers=headers)
-    with urllib.request.urlopen(req, timeout=30) as response:
-        return json.loads(response.read().decode("utf-8"))
+async def _post_json(url: str, headers: dict[str, str], payload: dict) -> dict:
+    response = await _get_client().post(url, headers=headers, json=payload)
+    response.raise_for_status()
+    return response.json()
 
 
-def call_openai(system_prompt: str, user_prompt: str) -> str:
+async def _stream_sse(url: str, headers: dict[str, str], payload: dict) -> AsyncIterator[dict]:
+    async with _get_client().stream("POST", url, headers=headers, json=payload) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:") :].strip()
+            if not data or data == "[DONE]":
+                continue
+            yield json.loads(data)
+
+
+def _openai_request(system_prompt: str, user_prompt: str) -> tuple[str, dict[str, str], dict]:
     url = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1/chat/completions")
     headers = {
         "Authorization": f"Bearer {settings.llm_api_key}",
@@ -30,11 +65,10 @@ def call_openai(system_prompt: str, user_prompt: str) -> str:
             {"role": "user", "content": user_prompt},
         ],
     }
-    response = _post_json(url, headers, payload)
-    return response["choices"][0]["message"]["content"]
+    return url, headers, payload
 
 
-def call_anthropic(system_prompt: str, user_prompt: str) -> str:
+def _anthropic_request(system_prompt: str, user_prompt: str) -> tuple[str, dict[str, str], dict]:
     url = os.environ.get("ANTHROPIC_BASE_URL", "https://api.anthropic.com/v1/messages")
     headers = {
         "x-api-key": settings.llm_api_key,
@@ -50,17 +84,60 @@ def call_anthropic(system_prompt: str, user_prompt: str) -> str:
             {"role": "user", "content": user_prompt},
         ],
     }
-    response = _post_json(url, headers, payload)
+    return url, headers, payload
+
+
+async def call_openai(system_prompt: str, user_prompt: str) -> str:
+    url, headers, payload = _openai_request(system_prompt, user_prompt)
+    response = await _post_json(url, headers, payload)
+    return response["choices"][0]["message"]["content"]
+
+
+async def stream_openai(system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+    url, headers, payload = _openai_request(system_prompt, user_prompt)
+    payload["stream"] = True
+    async for event in _stream_sse(url, headers, payload):
+        choices = event.get("choices") or []
+        if not choices:
+            continue
+        delta = choices[0].get("delta", {}).get("content")
+        if delta:
+            yield delta
+
+
+async def call_anthropic(system_prompt: str, user_prompt: str) -> str:
+    url, headers, payload = _anthropic_request(system_prompt, user_prompt)
+    response = await _post_json(url, headers, payload)
     content = response.get("content", [])
     if not content:
         return "{}"
     return content[0].get("text", "{}")
 
 
-def call_llm(system_prompt: str, user_prompt: str) -> str:
+async def stream_anthropic(system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+    url, headers, payload = _anthropic_request(system_prompt, user_prompt)
+    payload["stream"] = True
+    async for event in _stream_sse(url, headers, payload):
+        if event.get("type") != "content_block_delta":
+            continue
+        delta = event.get("delta", {}).get("text")
+        if delta:
+            yield delta
+
+
+async def call_llm(system_prompt: str, user_prompt: str) -> str:
+    provider = settings.llm_provider.lower()
+    if provider == "openai":
+        return await call_openai(system_prompt, user_prompt)
+    if provider == "anthropic":
+        return await call_anthropic(system_prompt, user_prompt)
+    raise ValueError(f"unsupported llm provider: {settings.llm_provider}")
+
+
+def stream_llm(system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
     provider = settings.llm_provider.lower()
     if provider == "openai":
-        return call_openai(system_prompt, user_prompt)
+        return stream_openai(system_prompt, user_prompt)
     if provider == "anthropic":
-        return call_anthropic(system_prompt, user_prompt)
+        return stream_anthropic(system_prompt, user_prompt)
     raise ValueError(f"unsupported llm provider: {settings.llm_provider}")
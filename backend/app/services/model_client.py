@@ -0,0 +1,115 @@
+﻿# backend/app/services/model_client.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+from app.config import settings
+from app.services.model_protocol import ModelServerError, read_message, write_message
+
+logger = logging.getLogger(__name__)
+
+Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class ModelClient:
+    # Thin per-process client for app.model_server. Each connection carries
+    # one request at a time; idle connections are kept for reuse.
+    def __init__(self, path: str, timeout_seconds: float, max_idle: int) -> None:
+        self.path = path
+        self.timeout_seconds = timeout_seconds
+        self.max_idle = max_idle
+        self._idle: list[Connection] = []
+        self.requests = 0
+        self.errors = 0
+
+    async def _exchange(self, connection: Connection, header: dict) -> tuple[dict, bytes]:
+        reader, writer = connection
+        try:
+            await write_message(writer, header)
+            response = await asyncio.wait_for(read_message(reader), self.timeout_seconds)
+            if response is None:
+                raise ModelServerError("model server closed the connection")
+        except BaseException:
+            writer.close()
+            raise
+
+        if len(self._idle) < self.max_idle:
+            self._idle.append(connection)
+        else:
+            writer.close()
+        return response
+
+    async def _request(self, header: dict) -> tuple[dict, bytes]:
+        self.requests += 1
+        try:
+            if self._idle:
+                try:
+                    body, payload = await self._exchange(self._idle.pop(), header)
+                except (OSError, ModelServerError):
+                    # The sidecar may have restarted while the connection sat idle.
+                    body, payload = await self._exchange(await asyncio.open_unix_connection(self.path), header)
+            else:
+                body, payload = await self._exchange(await asyncio.open_unix_connection(self.path), header)
+        except BaseException:
+            self.errors += 1
+            raise
+
+        if not body.get("ok"):
+            self.errors += 1
+            raise ModelServerError(body.get("error") or "model server request failed")
+        return body, payload
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        body, payload = await self._request({"op": "embed", "texts": texts})
+        return np.frombuffer(payload, dtype=np.float32).reshape(body["shape"])
+
+    async def rerank(self, pairs: list[tuple[str, str]]) -> list[float]:
+        body, _ = await self._request({"op": "rerank", "pairs": [list(pair) for pair in pairs]})
+        return body["scores"]
+
+    async def status(self) -> dict:
+        body, _ = await self._request({"op": "status"})
+        return body["models"]
+
+    def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    def stats(self) -> dict:
+        return {"socket": self.path, "requests": self.requests, "errors": self.errors, "idle": len(self._idle)}
+
+
+@lru_cache(maxsize=1)
+def get_model_client() -> ModelClient:
+    return ModelClient(
+        settings.model_server_socket,
+        settings.model_server_timeout_seconds,
+        settings.model_server_max_idle,
+    )
+
+
+async def warm_up() -> dict:
+    # The sidecar only listens once its models are warm, so readiness here is
+    # "the socket answers". It may start after the API; keep retrying.
+    delay = 0.1
+    while True:
+        try:
+            return {"models": await get_model_client().status()}
+        except (OSError, ModelServerError, asyncio.TimeoutError) as exc:
+            logger.info("model server not reachable yet: %s", exc)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+
+def close_model_client() -> None:
+    if get_model_client.cache_info().currsize:
+        get_model_client().close()
+
+
+def model_client_stats() -> dict:
+    return get_model_client().stats() if get_model_client.cache_info().currsize else {}
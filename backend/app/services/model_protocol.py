@@ -0,0 +1,41 @@
+﻿# backend/app/services/model_protocol.py
+from __future__ import annotations
+
+import asyncio
+import json
+import struct
+
+# One message is a JSON header plus an optional binary payload (raw float32
+# vectors), each prefixed by its length: !II header_length payload_length.
+_PREFIX = struct.Struct("!II")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+class ModelServerError(RuntimeError):
+    pass
+
+
+def encode_message(header: dict, payload: bytes = b"") -> bytes:
+    data = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return _PREFIX.pack(len(data), len(payload)) + data + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> tuple[dict, bytes] | None:
+    # None on a clean end of stream between messages.
+    try:
+        prefix = await reader.readexactly(_PREFIX.size)
+    except asyncio.IncompleteReadError as exc:
+        if not exc.partial:
+            return None
+        raise ModelServerError("truncated message prefix") from exc
+    header_length, payload_length = _PREFIX.unpack(prefix)
+    if header_length + payload_length > MAX_FRAME_BYTES:
+        raise ModelServerError(f"message of {header_length + payload_length} bytes exceeds the frame limit")
+    header = json.loads(await reader.readexactly(header_length))
+    payload = await reader.readexactly(payload_length) if payload_length else b""
+    return header, payload
+
+
+async def write_message(writer: asyncio.StreamWriter, header: dict, payload: bytes = b"") -> None:
+    writer.write(encode_message(header, payload))
+    await writer.drain()
@@ -0,0 +1,131 @@
+﻿# backend/app/services/persistence.py
+from __future__ import annotations
+
+import logging
+from dataclasses import astuple, dataclass
+from datetime import datetime
+from uuid import UUID
+
+import psycopg
+from psycopg.types.json import Jsonb
+
+from app.config import settings
+from app.db import get_async_conn
+from app.services.write_behind import WriteBehindQueue
+
+logger = logging.getLogger(__name__)
+
+INSERT_MESSAGE_SQL = """
+    INSERT INTO messages (id, conversation_id, role, content, created_at)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+INSERT_TRACE_SQL = """
+    INSERT INTO retrieval_traces (
+        conversation_id, message_id, retrieved_chunk_ids, similarity_scores,
+        rerank_scores, filters, corpus_snapshot_id, stage_timings, created_at
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+# Ids and timestamps are assigned when the row is built, so callers can hand
+# out the message id and conversation order is kept however late it is written.
+@dataclass(frozen=True)
+class MessageRow:
+    id: UUID
+    conversation_id: str
+    role: str
+    content: str
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class TraceRow:
+    conversation_id: str
+    message_id: UUID
+    retrieved_chunk_ids: list[str]
+    similarity_scores: list[float]
+    rerank_scores: list[float | None] | None
+    filters: Jsonb
+    corpus_snapshot_id: str | None
+    stage_timings: Jsonb | None
+    created_at: datetime
+
+
+PersistRow = MessageRow | TraceRow
+
+_writer: WriteBehindQueue[PersistRow] | None = None
+
+
+async def _insert(cur: psycopg.AsyncCursor, rows: list[PersistRow]) -> None:
+    # Messages first: traces reference them.
+    messages = [astuple(row) for row in rows if isinstance(row, MessageRow)]
+    traces = [astuple(row) for row in rows if isinstance(row, TraceRow)]
+    if messages:
+        await cur.executemany(INSERT_MESSAGE_SQL, messages)
+    if traces:
+        await cur.executemany(INSERT_TRACE_SQL, traces)
+
+
+async def write_rows(rows: list[PersistRow]) -> None:
+    async with get_async_conn() as conn:
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                await _insert(cur, rows)
+
+
+async def _flush(rows: list[PersistRow]) -> None:
+    try:
+        await write_rows(rows)
+    except psycopg.errors.IntegrityError:
+        # One bad row (e.g. an unknown conversation id) must not take the rest
+        # of the batch with it, so retry row by row and skip the failures.
+        async with get_async_conn() as conn:
+            async with conn.transaction():
+                async with conn.cursor() as cur:
+                    for row in rows:
+                        try:
+                            async with conn.transaction():
+                                await _insert(cur, [row])
+                        except psycopg.errors.IntegrityError as exc:
+                            logger.warning("skipping unwritable %s: %s", type(row).__name__, exc)
+
+
+def start_write_behind() -> None:
+    global _writer
+    if settings.write_behind_enabled and _writer is None:
+        _writer = WriteBehindQueue(
+            _flush,
+            maxsize=settings.write_behind_queue_size,
+            batch_size=settings.write_behind_batch_size,
+            flush_interval_ms=settings.write_behind_flush_interval_ms,
+            name="chat-write-behind",
+        )
+        _writer.start()
+
+
+async def close_write_behind() -> None:
+    global _writer
+    if _writer is not None:
+        await _writer.close()
+        _writer = None
+
+
+async def persist(rows: list[PersistRow]) -> None:
+    if _writer is None:
+        await write_rows(rows)
+        return
+    for row in rows:
+        await _writer.put(row)
+
+
+async def wait_for_pending_writes() -> None:
+    # Read-your-writes within this process for endpoints that read or reference
+    # chat rows: waits for rows enqueued before the call, not for later traffic.
+    if _writer is not None:
+        await _writer.join()
+
+
+def write_behind_stats() -> dict:
+    return _writer.stats() if _writer is not None else {}
@@ -1,30 +1,133 @@
 ﻿# backend/app/services/reranker.py
 from __future__ import annotations
 
+import asyncio
+import time
 from functools import lru_cache
-
-from sentence_transformers import CrossEncoder
+from typing import TYPE_CHECKING
 
 from app.config import settings
+from app.services.batching import MicroBatcher
+from app.services.cache import LRUCache, cache_key
+from app.services.executor import run_in_model_executor
+from app.services.model_client import get_model_client
+
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder
+
+RERANKER_BACKENDS = ("torch", "int8", "onnx")
+
+_score_cache: LRUCache[tuple[str, str], float] = LRUCache(settings.reranker_cache_size)
+
+
+def load_cross_encoder(model_name: str, backend: str, max_length: int) -> CrossEncoder:
+    if backend not in RERANKER_BACKENDS:
+        raise ValueError(f"unsupported reranker backend: {backend}")
+    from sentence_transformers import CrossEncoder
+
+    if backend == "onnx":
+        # ONNX Runtime CrossEncoders need sentence-transformers >= 4.0 with the onnx extra.
+        return CrossEncoder(model_name, max_length=max_length, backend="onnx")
+
+    model = CrossEncoder(model_name, max_length=max_length, device="cpu" if backend == "int8" else None)
+    if backend == "int8":
+        import torch
+
+        model.model = torch.quantization.quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
 
 
 @lru_cache(maxsize=1)
 def _model() -> CrossEncoder | None:
     if not settings.reranker_model:
         return None
-    return CrossEncoder(settings.reranker_model)
+    return load_cross_encoder(settings.reranker_model, settings.reranker_backend, settings.reranker_max_length)
+
+
+def truncate_passage(text: str, max_words: int) -> str:
+    # Cheap pre-truncation so the tokenizer never processes the full chunk;
+    # the model still applies its own max_length cut on tokens.
+    words = text.split()
+    if len(words) <= max_words:
+        return text
+    return " ".join(words[:max_words])
 
 
-def rerank_chunks(query: str, chunks: list[dict], top_n: int) -> list[dict]:
+def predict_pairs(pairs: list[tuple[str, str]]) -> list[float]:
     model = _model()
-    if model is None or not chunks:
+    scores = model.predict(pairs, batch_size=settings.reranker_batch_size, show_progress_bar=False)
+    return [float(score) for score in scores]
+
+
+def warm_up() -> dict[str, float]:
+    start = time.perf_counter()
+    _model()
+    loaded = time.perf_counter()
+    predict_pairs([("warm up", "warm up")])
+    return {"load_ms": (loaded - start) * 1000.0, "forward_ms": (time.perf_counter() - loaded) * 1000.0}
+
+
+@lru_cache(maxsize=1)
+def _batcher() -> MicroBatcher[tuple[str, str], float]:
+    return MicroBatcher(
+        predict_pairs,
+        max_batch_size=settings.rerank_batch_max_size,
+        max_wait_ms=settings.rerank_batch_max_wait_ms,
+        name="rerank-batcher",
+    )
+
+
+async def score_local(pairs: list[tuple[str, str]]) -> list[float]:
+    if settings.rerank_batch_max_size > 1:
+        futures = _batcher().submit_many(pairs)
+        return list(await asyncio.gather(*(asyncio.wrap_future(future) for future in futures)))
+    return await run_in_model_executor(predict_pairs, pairs)
+
+
+async def _score(pairs: list[tuple[str, str]]) -> list[float]:
+    if settings.model_server_socket:
+        return await get_model_client().rerank(pairs)
+    return await score_local(pairs)
+
+
+async def rerank_chunks(query: str, chunks: list[dict], top_n: int) -> list[dict]:
+    if not settings.reranker_model or not chunks:
         return chunks
 
-    pairs = [(query, chunk.get("text") or chunk.get("excerpt") or "") for chunk in chunks]
-    scores = model.predict(pairs)
+    # Keyed on the exact query that is scored: the cross-encoder is sensitive
+    # to case and spacing, so normalised variants may score differently.
+    query_key = cache_key("rerank", settings.reranker_model, query)
+    pending = []
+    for chunk in chunks:
+        cached = _score_cache.get((query_key, chunk["chunk_id"]))
+        if cached is None:
+            pending.append(chunk)
+        else:
+            chunk["rerank_score"] = cached
 
-    for chunk, score in zip(chunks, scores, strict=True):
-        chunk["rerank_score"] = float(score)
+    if pending:
+        max_words = settings.reranker_passage_max_words
+        pairs = [
+            (query, truncate_passage(chunk.get("text") or chunk.get("excerpt") or "", max_words))
+            for chunk in pending
+        ]
+        scores = await _score(pairs)
+        for chunk, score in zip(pending, scores, strict=True):
+            chunk["rerank_score"] = score
+            _score_cache.set((query_key, chunk["chunk_id"]), chunk["rerank_score"])
 
     reranked = sorted(chunks, key=lambda item: item.get("rerank_score", 0.0), reverse=True)
     return reranked[:top_n]
+
+
+def close_batcher() -> None:
+    if _batcher.cache_info().currsize:
+        _batcher().close()
+
+
+def rerank_cache_stats() -> dict[str, int]:
+    return _score_cache.stats()
+
+
+def rerank_batcher_stats() -> dict:
+    return _batcher().stats() if _batcher.cache_info().currsize else {}
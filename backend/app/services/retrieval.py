@@ -2,78 +2,270 @@
 from __future__ import annotations
 
 from datetime import date
+from functools import partial
 
-from pgvector.psycopg import Vector, register_vector
+import psycopg
+from pgvector.psycopg import Vector
 
-from app.db import get_conn
+from app.config import settings
+from app.db import get_async_conn
 from app.services.embeddings import embed_text
+from app.services.timing import stage
 
+# Must match the configuration used by chunks.search_tsv (migration 0002).
+FULLTEXT_CONFIG = "simple"
 
-def retrieve_chunks(
-    query: str,
-    top_k: int,
+RESULT_COLUMNS = """
+    chunks.id AS chunk_id,
+    chunks.page_start,
+    chunks.page_end,
+    chunks.section_path,
+    COALESCE(chunks.excerpt, LEFT(chunks.text, 500)) AS excerpt,
+    chunks.text AS full_text,
+    document_versions.id AS version_id,
+    document_versions.version_label,
+    document_versions.effective_date,
+    documents.id AS document_id,
+    documents.title AS document_title
+"""
+
+CHUNK_JOINS = """
+    JOIN document_versions ON chunks.document_version_id = document_versions.id
+    JOIN documents ON document_versions.document_id = documents.id
+"""
+
+# Filter columns on the version/document side and their copies on embeddings
+# (migration 0003). ANN candidates filter on the latter so the HNSW scan sees
+# the predicates instead of having its result post-filtered by joins.
+VERSION_FILTER_COLUMNS = {
+    "is_active": "document_versions.is_active",
+    "institution": "documents.institution",
+    "language": "document_versions.language",
+    "categories": "document_versions.categories",
+    "effective_date": "document_versions.effective_date",
+}
+EMBEDDING_FILTER_COLUMNS = {
+    "is_active": "embeddings.is_active",
+    "institution": "embeddings.institution",
+    "language": "embeddings.language",
+    "categories": "embeddings.categories",
+    "effective_date": "embeddings.effective_date",
+}
+
+SEARCH_SETTINGS_SQL = """
+    SELECT
+        set_config('hnsw.ef_search', %(ef_search)s, true),
+        set_config('hnsw.iterative_scan', %(iterative_scan)s, true),
+        set_config('hnsw.max_scan_tuples', %(max_scan_tuples)s, true)
+"""
+# Only the exact fallback is bounded by the timeout; the ANN query runs as
+# before, so a cancellation can only ever cost the fallback.
+EXACT_SEARCH_SQL = """
+    SELECT
+        set_config('enable_indexscan', 'off', true),
+        set_config('statement_timeout', %(statement_timeout)s, true)
+"""
+
+
+def _build_filters(
+    columns: dict[str, str],
     institution: str | None,
     language: str | None,
     categories: list[str] | None,
     effective_date_start: date | None,
     effective_date_end: date | None,
     active_only: bool,
-):
-    embedding = embed_text(query)
-    vector = Vector(embedding)
-
+) -> tuple[list[str], dict[str, object]]:
     filters = []
-    params: list[object] = []
+    params: dict[str, object] = {}
 
     if active_only:
-        filters.append("document_versions.is_active = TRUE")
+        filters.append(f"{columns['is_active']} = TRUE")
     if institution:
-        filters.append("documents.institution = %s")
-        params.append(institution)
+        filters.append(f"{columns['institution']} = %(institution)s")
+        params["institution"] = institution
     if language:
-        filters.append("document_versions.language = %s")
-        params.append(language)
+        filters.append(f"{columns['language']} = %(language)s")
+        params["language"] = language
     if categories:
-        filters.append("document_versions.categories && %s")
-        params.append(categories)
+        filters.append(f"{columns['categories']} && %(categories)s")
+        params["categories"] = categories
     if effective_date_start:
-        filters.append("document_versions.effective_date >= %s")
-        params.append(effective_date_start)
+        filters.append(f"{columns['effective_date']} >= %(effective_date_start)s")
+        params["effective_date_start"] = effective_date_start
     if effective_date_end:
-        filters.append("document_versions.effective_date <= %s")
-        params.append(effective_date_end)
+        filters.append(f"{columns['effective_date']} <= %(effective_date_end)s")
+        params["effective_date_end"] = effective_date_end
+
+    return filters, params
+
+
+def _where(filters: list[str]) -> str:
+    return "WHERE " + " AND ".join(filters) if filters else ""
+
+
+def _compact_order_by(vector_index: str, dim: int) -> str:
+    if vector_index == "halfvec":
+        return f"embeddings.vector::halfvec({dim}) <-> %(vector)s::halfvec({dim})"
+    if vector_index == "binary":
+        return f"binary_quantize(embeddings.vector)::bit({dim}) <~> binary_quantize(%(vector)s)"
+    raise ValueError(f"unsupported vector index: {vector_index}")
+
+
+def _nearest_sql(embedding_filters: list[str], limit_param: str, vector_index: str) -> str:
+    if vector_index == "vector":
+        return f"""
+            SELECT embeddings.chunk_id, embeddings.vector <-> %(vector)s AS distance
+            FROM embeddings
+            {_where(embedding_filters)}
+            ORDER BY embeddings.vector <-> %(vector)s
+            LIMIT %({limit_param})s
+        """
+
+    # First pass over the compact index (built by scripts/set_vector_index.py),
+    # then full-precision re-scoring of the shortlist from the heap vectors.
+    return f"""
+        SELECT chunk_id, distance
+        FROM (
+            SELECT embeddings.chunk_id, embeddings.vector <-> %(vector)s AS distance
+            FROM embeddings
+            {_where(embedding_filters)}
+            ORDER BY {_compact_order_by(vector_index, settings.embedding_dim)}
+            LIMIT %(rescore_limit)s
+        ) AS shortlist
+        ORDER BY distance
+        LIMIT %({limit_param})s
+    """
+
+
+def _vector_sql(embedding_filters: list[str], vector_index: str) -> str:
+    # Iterative scans may return neighbours slightly out of order, so the
+    # shortlist is re-sorted by its exact distance.
+    return f"""
+        WITH nearest AS MATERIALIZED ({_nearest_sql(embedding_filters, "top_k", vector_index)})
+        SELECT
+            {RESULT_COLUMNS},
+            nearest.distance,
+            NULL::FLOAT8 AS fusion_score
+        FROM nearest
+        JOIN chunks ON nearest.chunk_id = chunks.id
+        {CHUNK_JOINS}
+        ORDER BY nearest.distance
+    """
 
-    where_sql = "WHERE " + " AND ".join(filters) if filters else ""
 
-    sql = f"""
+def _hybrid_sql(embedding_filters: list[str], version_filters: list[str], vector_index: str) -> str:
+    # Lexical and ANN candidates are generated in one statement and combined
+    # with reciprocal-rank fusion: score = sum(1 / (rrf_k + rank)).
+    lexical_filters = [
+        f"chunks.search_tsv @@ websearch_to_tsquery('{FULLTEXT_CONFIG}', %(query)s)",
+        *version_filters,
+    ]
+    return f"""
+        WITH vector_hits AS (
+            SELECT chunk_id, distance, ROW_NUMBER() OVER (ORDER BY distance) AS rank
+            FROM ({_nearest_sql(embedding_filters, "candidates", vector_index)}) AS nearest
+        ),
+        lexical_hits AS (
+            SELECT chunk_id, ROW_NUMBER() OVER (ORDER BY lexical_rank DESC) AS rank
+            FROM (
+                SELECT
+                    chunks.id AS chunk_id,
+                    ts_rank_cd(chunks.search_tsv, websearch_to_tsquery('{FULLTEXT_CONFIG}', %(query)s)) AS lexical_rank
+                FROM chunks
+                {CHUNK_JOINS}
+                {_where(lexical_filters)}
+                ORDER BY lexical_rank DESC
+                LIMIT %(candidates)s
+            ) AS matched
+        ),
+        fused AS (
+            SELECT chunk_id, SUM(1.0 / (%(rrf_k)s + rank)) AS fusion_score
+            FROM (
+                SELECT chunk_id, rank FROM vector_hits
+                UNION ALL
+                SELECT chunk_id, rank FROM lexical_hits
+            ) AS hits
+            GROUP BY chunk_id
+        )
         SELECT
-            chunks.id AS chunk_id,
-            chunks.page_start,
-            chunks.page_end,
-            chunks.section_path,
-            COALESCE(chunks.excerpt, LEFT(chunks.text, 500)) AS excerpt,
-            chunks.text AS full_text,
-            document_versions.id AS version_id,
-            document_versions.version_label,
-            document_versions.effective_date,
-            documents.id AS document_id,
-            documents.title AS document_title,
-            (embeddings.vector <-> %s) AS distance
-        FROM embeddings
-        JOIN chunks ON embeddings.chunk_id = chunks.id
-        JOIN document_versions ON chunks.document_version_id = document_versions.id
-        JOIN documents ON document_versions.document_id = documents.id
-        {where_sql}
-        ORDER BY embeddings.vector <-> %s
-        LIMIT %s
+            {RESULT_COLUMNS},
+            COALESCE(
+                vector_hits.distance,
+                (SELECT embeddings.vector <-> %(vector)s FROM embeddings WHERE embeddings.chunk_id = chunks.id LIMIT 1)
+            ) AS distance,
+            fused.fusion_score::FLOAT8 AS fusion_score
+        FROM fused
+        JOIN chunks ON chunks.id = fused.chunk_id
+        LEFT JOIN vector_hits ON vector_hits.chunk_id = fused.chunk_id
+        {CHUNK_JOINS}
+        ORDER BY fused.fusion_score DESC
+        LIMIT %(top_k)s
     """
 
-    with get_conn() as conn:
-        register_vector(conn)
-        with conn.cursor() as cur:
-            params_with_vector = [vector] + params + [vector, top_k]
-            cur.execute(sql, params_with_vector)
-            rows = cur.fetchall()
+
+def _search_settings() -> dict[str, str]:
+    return {
+        "ef_search": str(settings.hnsw_ef_search),
+        "iterative_scan": settings.hnsw_iterative_scan,
+        "max_scan_tuples": str(settings.hnsw_max_scan_tuples),
+    }
+
+
+async def _run_search(conn: psycopg.AsyncConnection, sql: str, params: dict[str, object], exact: bool) -> list[dict]:
+    with stage("sql"):
+        async with conn.transaction():
+            async with conn.pipeline():
+                await conn.execute(SEARCH_SETTINGS_SQL, _search_settings())
+                if exact:
+                    await conn.execute(EXACT_SEARCH_SQL, {"statement_timeout": str(settings.retrieval_statement_timeout_ms)})
+                cur = await conn.execute(sql, params)
+                return await cur.fetchall()
+
+
+async def retrieve_chunks(
+    query: str,
+    top_k: int,
+    institution: str | None,
+    language: str | None,
+    categories: list[str] | None,
+    effective_date_start: date | None,
+    effective_date_end: date | None,
+    active_only: bool,
+    mode: str = "vector",
+):
+    embedding = await embed_text(query)
+
+    filter_args = (institution, language, categories, effective_date_start, effective_date_end, active_only)
+    embedding_filters, params = _build_filters(EMBEDDING_FILTER_COLUMNS, *filter_args)
+    version_filters, _ = _build_filters(VERSION_FILTER_COLUMNS, *filter_args)
+    params["vector"] = Vector(embedding)
+    params["top_k"] = top_k
+
+    if mode == "hybrid":
+        build_sql = partial(_hybrid_sql, embedding_filters, version_filters)
+        params["query"] = query
+        params["candidates"] = max(top_k, settings.hybrid_candidates)
+        params["rrf_k"] = settings.hybrid_rrf_k
+    elif mode == "vector":
+        build_sql = partial(_vector_sql, embedding_filters)
+    else:
+        raise ValueError(f"unsupported retrieval mode: {mode}")
+    params["rescore_limit"] = max(top_k, params.get("candidates", 0)) * settings.vector_rescore_factor
+
+    # Anything beyond the active-version predicate (which has its own partial
+    # index) can leave the HNSW scan short of top_k rows. In that case the query
+    # is re-run as an exact scan over the filtered rows, bounded by the
+    # statement timeout; if that times out the ANN rows are kept.
+    selective = len(embedding_filters) > (1 if active_only else 0)
+    async with get_async_conn() as conn:
+        rows = await _run_search(conn, build_sql(settings.vector_index), params, exact=False)
+        if selective and len(rows) < top_k:
+            # The exact scan sorts the full-precision vectors directly.
+            try:
+                rows = await _run_search(conn, build_sql("vector"), params, exact=True)
+            except psycopg.errors.QueryCanceled:
+                pass
 
     results = []
     for row in rows:
@@ -94,6 +286,7 @@ def retrieve_chunks(
                 "document_title": row["document_title"],
                 "score": score,
                 "distance": distance,
+                "fusion_score": row["fusion_score"],
             }
         )
 
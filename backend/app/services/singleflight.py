@@ -0,0 +1,42 @@
+﻿# backend/app/services/singleflight.py
+from __future__ import annotations
+
+import asyncio
+from typing import Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    # At most one computation per key is in flight in this process. The
+    # caller that claims a key resolves its future; callers that join while
+    # it is unresolved await the same future.
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future[T]] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def claim(self, key: Hashable) -> asyncio.Future[T] | None:
+        if key in self._calls:
+            return None
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        future.add_done_callback(lambda _: self._release(key, future))
+        self.leaders += 1
+        return future
+
+    def join(self, key: Hashable) -> asyncio.Future[T] | None:
+        future = self._calls.get(key)
+        if future is not None:
+            self.followers += 1
+        return future
+
+    def _release(self, key: Hashable, future: asyncio.Future[T]) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict[str, int]:
+        return {"in_flight": len(self._calls), "leaders": self.leaders, "followers": self.followers}
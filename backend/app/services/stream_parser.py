@@ -0,0 +1,87 @@
+﻿# backend/app/services/stream_parser.py
+from __future__ import annotations
+
+import json
+from typing import Any
+
+# Top-level keys of the structured answer whose array items are emitted as
+# soon as each item is complete, mapped to the event name used for them.
+STREAMED_ARRAYS = {"claims": "claim", "steps": "step"}
+
+
+class AnswerStreamParser:
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._pos = 0
+        # Each open container is (kind, key it was opened under at the top level).
+        self._stack: list[tuple[str, str | None]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._current_key: str | None = None
+        self._item_start: int | None = None
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+    def _streamed_array(self) -> str | None:
+        if len(self._stack) == 2 and self._stack[1][0] == "[":
+            return self._stack[1][1] if self._stack[1][1] in STREAMED_ARRAYS else None
+        return None
+
+    def feed(self, text: str) -> list[tuple[str, Any]]:
+        self._buffer += text
+        events: list[tuple[str, Any]] = []
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            index = self._pos
+            char = buffer[index]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._close_string(index, events)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char in "{[":
+                key = self._current_key if len(self._stack) == 1 else None
+                if char == "{" and self._streamed_array() and self._item_start is None:
+                    self._item_start = index
+                self._stack.append((char, key))
+                self._expect_key = char == "{"
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if char == "}" and self._item_start is not None and self._streamed_array():
+                    self._emit(self._item_start, index, events)
+                    self._item_start = None
+                self._expect_key = False
+            elif char == ",":
+                self._expect_key = bool(self._stack) and self._stack[-1][0] == "{"
+            elif char == ":":
+                self._expect_key = False
+        return events
+
+    def _close_string(self, end: int, events: list[tuple[str, Any]]) -> None:
+        if len(self._stack) == 1 and self._expect_key:
+            self._current_key = json.loads(self._buffer[self._string_start : end + 1])
+        elif self._streamed_array() and self._item_start is None:
+            self._emit(self._string_start, end, events)
+
+    def _emit(self, start: int, end: int, events: list[tuple[str, Any]]) -> None:
+        key = self._stack[1][1]
+        try:
+            value = json.loads(self._buffer[start : end + 1])
+        except json.JSONDecodeError:
+            return
+        events.append((STREAMED_ARRAYS[key], value))
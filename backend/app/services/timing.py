@@ -0,0 +1,81 @@
+﻿# backend/app/services/timing.py
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+
+StageObserver = Callable[[str, float], None]
+R = TypeVar("R")
+
+_current: ContextVar["RequestTimings | None"] = ContextVar("request_timings", default=None)
+_observers: list[StageObserver] = []
+
+
+class RequestTimings:
+    # Per-request stage durations in seconds. A stage entered more than once
+    # (e.g. two SQL round trips) accumulates.
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.durations: dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_milliseconds(self) -> dict[str, float]:
+        return {name: round(seconds * 1000, 3) for name, seconds in self.durations.items()}
+
+    def server_timing(self, include_total: bool = True) -> str:
+        metrics = [f"{name};dur={ms}" for name, ms in self.as_milliseconds().items()]
+        if include_total:
+            metrics.append(f"total;dur={round(self.elapsed() * 1000, 3)}")
+        return ", ".join(metrics)
+
+
+def start_request_timings() -> RequestTimings:
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def current_timings() -> RequestTimings | None:
+    return _current.get()
+
+
+def add_stage_observer(observer: StageObserver) -> None:
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+    for observer in _observers:
+        observer(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def timed_stage(name: str) -> Callable[[Callable[..., Awaitable[R]]], Callable[..., Awaitable[R]]]:
+    def decorator(func: Callable[..., Awaitable[R]]) -> Callable[..., Awaitable[R]]:
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> R:
+            with stage(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
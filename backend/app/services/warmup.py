@@ -0,0 +1,77 @@
+﻿# backend/app/services/warmup.py
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from functools import partial
+from typing import Awaitable, Callable
+
+from app.config import settings
+from app.services import embeddings, model_client, reranker
+from app.services.executor import run_in_model_executor
+
+logger = logging.getLogger(__name__)
+
+# Per model: status is pending, loading, ready, failed or lazy (warmup
+# disabled, the model loads on first use).
+_state: dict[str, dict] = {}
+_task: asyncio.Task | None = None
+
+WarmUp = Callable[[], Awaitable[dict]]
+
+
+def _models() -> dict[str, WarmUp]:
+    if settings.model_server_socket:
+        # The sidecar holds the models; this process only waits for it.
+        return {"model_server": model_client.warm_up}
+    models: dict[str, WarmUp] = {"embeddings": partial(run_in_model_executor, embeddings.warm_up)}
+    if settings.reranker_model:
+        models["reranker"] = partial(run_in_model_executor, reranker.warm_up)
+    return models
+
+
+async def _warm(name: str, warm_up: WarmUp) -> None:
+    state = _state[name]
+    state["status"] = "loading"
+    start = time.monotonic()
+    try:
+        state.update(await warm_up())
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("warming up %s failed", name)
+        state.update(status="failed", error=str(exc))
+        return
+    state.update(status="ready", total_ms=(time.monotonic() - start) * 1000.0)
+    logger.info("%s model ready in %.0f ms", name, state["total_ms"])
+
+
+async def _warm_all(models: dict[str, WarmUp]) -> None:
+    await asyncio.gather(*(_warm(name, warm_up) for name, warm_up in models.items()))
+
+
+def start_warmup() -> None:
+    # Runs in the background so the server starts answering health checks
+    # straight away; traffic should wait for /health/ready.
+    global _task
+    models = _models()
+    status = "pending" if settings.model_warmup else "lazy"
+    _state.clear()
+    _state.update({name: {"status": status} for name in models})
+    if settings.model_warmup:
+        _task = asyncio.create_task(_warm_all(models), name="model-warmup")
+
+
+async def stop_warmup() -> None:
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await _task
+    _task = None
+
+
+def readiness() -> tuple[bool, dict]:
+    ready = bool(_state) and all(state["status"] in ("ready", "lazy") for state in _state.values())
+    return ready, {name: dict(state) for name, state in _state.items()}
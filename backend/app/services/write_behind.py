@@ -0,0 +1,140 @@
+﻿# backend/app/services/write_behind.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WriteBehindQueue(Generic[T]):
+    # Bounded asyncio queue drained by one background task, which hands up to
+    # batch_size items at a time to ``flush``. put() waits while the queue is
+    # full, so producers slow down instead of buffering without limit.
+    def __init__(
+        self,
+        flush: Callable[[list[T]], Awaitable[None]],
+        maxsize: int,
+        batch_size: int,
+        flush_interval_ms: float,
+        max_retries: int = 3,
+        name: str = "write-behind",
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.flush = flush
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_ms / 1000.0
+        self.max_retries = max_retries
+        self.name = name
+        self._queue: asyncio.Queue[T] | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        # Items leave the queue in the order they entered it and are finished
+        # in that order, so a count of finished items is a watermark over the
+        # enqueued sequence numbers.
+        self._finished = 0
+        self._finished_changed: asyncio.Condition | None = None
+        self._counters = {"enqueued": 0, "flushed": 0, "batches": 0, "retries": 0, "dropped": 0, "full_waits": 0}
+
+    def start(self) -> None:
+        # The queue is bound to the running loop, so it is created here rather
+        # than in __init__.
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._finished_changed = asyncio.Condition()
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def put(self, item: T) -> int:
+        # Returns the item's sequence number. Queue.put inserts without yielding
+        # afterwards, so the counter matches the queue order.
+        if self._queue is None or self._closing:
+            raise RuntimeError(f"{self.name} is not running")
+        if self._queue.full():
+            self._counters["full_waits"] += 1
+        await self._queue.put(item)
+        self._counters["enqueued"] += 1
+        return self._counters["enqueued"]
+
+    async def wait_for(self, seq: int) -> None:
+        # Returns once every item up to and including ``seq`` has been flushed
+        # (or dropped), regardless of what is enqueued after it.
+        if self._finished_changed is None:
+            return
+        async with self._finished_changed:
+            await self._finished_changed.wait_for(lambda: self._finished >= seq)
+
+    async def join(self) -> None:
+        # Waits for the items enqueued before the call only; Queue.join would
+        # also wait for later ones and may never return under steady traffic.
+        await self.wait_for(self._counters["enqueued"])
+
+    async def close(self, timeout: float | None = 10.0) -> None:
+        if self._task is None or self._closing:
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error("%s: %d items not flushed before shutdown", self.name, self._queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "maxsize": self.maxsize,
+        }
+
+    async def _collect(self) -> list[T]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval_seconds
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0 or self._closing:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush_with_retries(self, batch: list[T]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.flush(batch)
+            except Exception:  # noqa: BLE001
+                if attempt == self.max_retries:
+                    logger.exception("%s: dropping %d items after %d attempts", self.name, len(batch), attempt + 1)
+                    self._counters["dropped"] += len(batch)
+                    return
+                self._counters["retries"] += 1
+                await asyncio.sleep(min(0.1 * 2**attempt, 2.0))
+            else:
+                self._counters["flushed"] += len(batch)
+                self._counters["batches"] += 1
+                return
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            try:
+                await self._flush_with_retries(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                async with self._finished_changed:
+                    self._finished += len(batch)
+                    self._finished_changed.notify_all()
@@ -1,25 +1,61 @@
 ﻿# backend/app/storage.py
 from __future__ import annotations
 
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
 from pathlib import Path
-from uuid import uuid4
+from typing import BinaryIO
 
 from fastapi import UploadFile
 
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    path: str
+    sha256: str
+    size: int
+
 
 def ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
-def save_upload_file(base_dir: str, version_id: str, upload_file: UploadFile) -> str:
-    target_dir = Path(base_dir) / version_id
-    ensure_dir(target_dir)
-    filename = f"{uuid4().hex}_{upload_file.filename}"
-    target_path = target_dir / filename
-    with target_path.open("wb") as target:
-        while True:
-            chunk = upload_file.file.read(1024 * 1024)
-            if not chunk:
-                break
-            target.write(chunk)
-    return str(target_path)
+def content_path(base_dir: str, sha256: str, suffix: str) -> Path:
+    return Path(base_dir) / "sha256" / sha256[:2] / sha256[2:4] / f"{sha256}{suffix}"
+
+
+def save_stream(base_dir: str, filename: str, source: BinaryIO) -> StoredFile:
+    # Content-addressed: the file is hashed while it is copied to a temporary
+    # file on the same filesystem, then renamed into place. Identical uploads
+    # share one file. The suffix is kept because the parser picks the
+    # document type from it.
+    staging_dir = Path(base_dir) / "tmp"
+    ensure_dir(staging_dir)
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=staging_dir, delete=False) as staging:
+        try:
+            while chunk := source.read(CHUNK_SIZE):
+                digest.update(chunk)
+                staging.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            os.unlink(staging.name)
+            raise
+
+    sha256 = digest.hexdigest()
+    target_path = content_path(base_dir, sha256, Path(filename or "").suffix.lower())
+    if target_path.exists():
+        os.unlink(staging.name)
+    else:
+        ensure_dir(target_path.parent)
+        os.replace(staging.name, target_path)
+    return StoredFile(path=str(target_path), sha256=sha256, size=size)
+
+
+def save_upload_file(base_dir: str, upload_file: UploadFile) -> StoredFile:
+    return save_stream(base_dir, upload_file.filename, upload_file.file)
@@ -0,0 +1,11 @@
+﻿-- backend/db/migrations/0002_chunks_fulltext.sql
+
+-- The 'simple' configuration keeps tokens such as form numbers, course codes and
+-- clause numbers ("4.2.1") intact and works for every corpus language.
+ALTER TABLE chunks
+    ADD COLUMN IF NOT EXISTS search_tsv TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', COALESCE(section_path, '')), 'A')
+        || setweight(to_tsvector('simple', text), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_chunks_search_tsv ON chunks USING gin (search_tsv);
@@ -0,0 +1,121 @@
+﻿-- backend/db/migrations/0003_embeddings_filters.sql
+
+-- Retrieval filters are denormalised onto embeddings so the ANN scan can apply
+-- them directly instead of post-filtering the HNSW result through joins.
+ALTER TABLE embeddings
+    ADD COLUMN IF NOT EXISTS document_version_id UUID REFERENCES document_versions(id) ON DELETE CASCADE,
+    ADD COLUMN IF NOT EXISTS institution TEXT,
+    ADD COLUMN IF NOT EXISTS language TEXT,
+    ADD COLUMN IF NOT EXISTS categories TEXT[],
+    ADD COLUMN IF NOT EXISTS effective_date DATE,
+    ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT TRUE;
+
+UPDATE embeddings
+SET
+    document_version_id = document_versions.id,
+    institution = documents.institution,
+    language = document_versions.language,
+    categories = document_versions.categories,
+    effective_date = document_versions.effective_date,
+    is_active = document_versions.is_active
+FROM chunks
+JOIN document_versions ON chunks.document_version_id = document_versions.id
+JOIN documents ON document_versions.document_id = documents.id
+WHERE embeddings.chunk_id = chunks.id
+  AND embeddings.document_version_id IS NULL;
+
+-- Writers that know the version metadata (the ingestion worker) supply the
+-- columns themselves; anything else gets them filled from the chunk.
+CREATE OR REPLACE FUNCTION embeddings_fill_filters() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.document_version_id IS NULL THEN
+        SELECT
+            document_versions.id,
+            documents.institution,
+            document_versions.language,
+            document_versions.categories,
+            document_versions.effective_date,
+            document_versions.is_active
+        INTO
+            NEW.document_version_id,
+            NEW.institution,
+            NEW.language,
+            NEW.categories,
+            NEW.effective_date,
+            NEW.is_active
+        FROM chunks
+        JOIN document_versions ON chunks.document_version_id = document_versions.id
+        JOIN documents ON document_versions.document_id = documents.id
+        WHERE chunks.id = NEW.chunk_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_embeddings_fill_filters ON embeddings;
+CREATE TRIGGER trg_embeddings_fill_filters
+    BEFORE INSERT ON embeddings
+    FOR EACH ROW EXECUTE FUNCTION embeddings_fill_filters();
+
+CREATE OR REPLACE FUNCTION document_versions_sync_embedding_filters() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE embeddings
+    SET
+        language = NEW.language,
+        categories = NEW.categories,
+        effective_date = NEW.effective_date,
+        is_active = NEW.is_active
+    WHERE document_version_id = NEW.id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_document_versions_sync_embedding_filters ON document_versions;
+CREATE TRIGGER trg_document_versions_sync_embedding_filters
+    AFTER UPDATE OF language, categories, effective_date, is_active ON document_versions
+    FOR EACH ROW
+    WHEN (
+        OLD.language IS DISTINCT FROM NEW.language
+        OR OLD.categories IS DISTINCT FROM NEW.categories
+        OR OLD.effective_date IS DISTINCT FROM NEW.effective_date
+        OR OLD.is_active IS DISTINCT FROM NEW.is_active
+    )
+    EXECUTE FUNCTION document_versions_sync_embedding_filters();
+
+CREATE OR REPLACE FUNCTION documents_sync_embedding_filters() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE embeddings
+    SET institution = NEW.institution
+    WHERE document_version_id IN (SELECT id FROM document_versions WHERE document_id = NEW.id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_documents_sync_embedding_filters ON documents;
+CREATE TRIGGER trg_documents_sync_embedding_filters
+    AFTER UPDATE OF institution ON documents
+    FOR EACH ROW
+    WHEN (OLD.institution IS DISTINCT FROM NEW.institution)
+    EXECUTE FUNCTION documents_sync_embedding_filters();
+
+-- Default searches only look at active versions, so they get their own HNSW
+-- graph that never contains inactive neighbours. scripts/set_vector_index.py
+-- can replace it with a compact halfvec or binary graph; re-running the
+-- migrations must not bring the full-precision one back next to it.
+DO $$
+BEGIN
+    IF to_regclass('idx_embeddings_halfvec_active') IS NULL
+        AND to_regclass('idx_embeddings_binary_active') IS NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_embeddings_vector_active
+            ON embeddings USING hnsw (vector vector_l2_ops) WHERE is_active;
+    END IF;
+END;
+$$;
+-- The partial graph replaces the table-wide one from 0001: searches that
+-- include inactive versions use the exact scan, so keeping both would only
+-- double the memory and the cost of every embeddings insert.
+DROP INDEX IF EXISTS idx_embeddings_vector;
+CREATE INDEX IF NOT EXISTS idx_embeddings_version_id ON embeddings(document_version_id);
+CREATE INDEX IF NOT EXISTS idx_embeddings_filters
+    ON embeddings(institution, language, effective_date) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_embeddings_categories ON embeddings USING gin (categories);
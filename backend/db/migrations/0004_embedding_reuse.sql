@@ -0,0 +1,10 @@
+﻿-- backend/db/migrations/0004_embedding_reuse.sql
+
+-- Lets ingestion find existing vectors for unchanged chunk text:
+-- chunks by source_hash, then embeddings by (chunk_id, model_name).
+CREATE INDEX IF NOT EXISTS idx_chunks_source_hash ON chunks(source_hash);
+CREATE INDEX IF NOT EXISTS idx_embeddings_chunk_model ON embeddings(chunk_id, model_name);
+
+ALTER TABLE ingestion_jobs
+    ADD COLUMN IF NOT EXISTS chunks_total INTEGER,
+    ADD COLUMN IF NOT EXISTS chunks_reused INTEGER;
@@ -0,0 +1,15 @@
+﻿-- backend/db/migrations/0006_answer_cache.sql
+
+-- Semantic cache for chat answers. Entries are matched on filters_key and
+-- corpus_key first, then by cosine distance between query vectors.
+CREATE TABLE IF NOT EXISTS answer_cache (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    query_vector VECTOR NOT NULL,
+    filters_key TEXT NOT NULL,
+    corpus_key TEXT NOT NULL,
+    answer JSONB NOT NULL,
+    chunks JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_answer_cache_scope ON answer_cache(filters_key, corpus_key, created_at);
@@ -0,0 +1,13 @@
+﻿-- backend/db/migrations/0007_corpus_state.sql
+
+-- Single-row generation counter for the searchable corpus. It is bumped in the
+-- same transaction as any change to what retrieval can see (version
+-- activation, ingestion completion) and then published on the Redis channel
+-- corpus:epoch, so caches can key on it.
+CREATE TABLE IF NOT EXISTS corpus_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    epoch BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO corpus_state (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,5 @@
+﻿-- backend/db/migrations/0008_stage_timings.sql
+
+-- Per-stage durations in milliseconds, e.g. {"embed": 3.1, "sql": 12.4}.
+ALTER TABLE retrieval_traces ADD COLUMN IF NOT EXISTS stage_timings JSONB;
+ALTER TABLE ingestion_jobs ADD COLUMN IF NOT EXISTS stage_timings JSONB;
@@ -0,0 +1,15 @@
+﻿-- backend/db/migrations/0009_import_batches.sql
+
+-- Groups the ingestion jobs created by one bulk import so progress can be
+-- aggregated per batch.
+CREATE TABLE IF NOT EXISTS import_batches (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    source_name TEXT,
+    documents_total INTEGER NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE ingestion_jobs
+    ADD COLUMN IF NOT EXISTS import_batch_id UUID REFERENCES import_batches(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_import_batch_id ON ingestion_jobs(import_batch_id);
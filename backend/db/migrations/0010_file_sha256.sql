@@ -0,0 +1,8 @@
+﻿-- backend/db/migrations/0010_file_sha256.sql
+
+-- Content hash of the uploaded file; versions with the same hash can reuse an
+-- earlier version's chunks and embeddings instead of being re-ingested.
+ALTER TABLE document_versions ADD COLUMN IF NOT EXISTS file_sha256 TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_document_versions_file_sha256
+    ON document_versions(file_sha256) WHERE file_sha256 IS NOT NULL;
@@ -0,0 +1,11 @@
+﻿-- backend/db/migrations/0011_import_batch_status.sql
+
+-- documents_total now counts the documents actually committed by an import;
+-- documents_expected is the manifest size and status records whether the
+-- import finished storing everything or stopped part way.
+ALTER TABLE import_batches ADD COLUMN IF NOT EXISTS documents_expected INTEGER;
+ALTER TABLE import_batches ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'importing';
+ALTER TABLE import_batches ADD COLUMN IF NOT EXISTS error_message TEXT;
+
+UPDATE import_batches SET documents_expected = documents_total, status = 'imported'
+WHERE documents_expected IS NULL;
@@ -0,0 +1,114 @@
+﻿# scripts/bench_chunking.py
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from sentence_transformers import SentenceTransformer
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "worker"))
+
+from app.chunking import Chunk, chunk_document, chunk_text  # noqa: E402
+from app.parsing import iter_pages  # noqa: E402
+from app.sectioning import extract_sections  # noqa: E402
+
+
+def load_sections(file_path: str) -> list[tuple[int, str | None, str]]:
+    return [
+        (page_number, section_path, text)
+        for page_number, page_text in iter_pages(file_path)
+        for section_path, text in extract_sections(page_text)
+    ]
+
+
+def per_section_chunks(sections: list[tuple[int, str | None, str]]) -> list[Chunk]:
+    # The previous strategy: fixed word windows inside every page section.
+    return [chunk for page_number, path, text in sections for chunk in chunk_text(text, page_number, path)]
+
+
+def summarize(
+    chunks: list[Chunk],
+    seconds: float,
+    model: SentenceTransformer,
+    budget: int,
+    min_tokens: int,
+    embed: bool,
+) -> dict:
+    texts = [chunk.text for chunk in chunks]
+    tokens = [len(ids) for ids in model.tokenizer(texts, add_special_tokens=False)["input_ids"]] if texts else [0]
+    report = {
+        "chunks": len(chunks),
+        "chunk_seconds": seconds,
+        "tokens_mean": statistics.mean(tokens),
+        "tokens_max": max(tokens),
+        "over_budget": sum(count > budget for count in tokens),
+        "under_min_tokens": sum(count < min_tokens for count in tokens),
+        "multi_page": sum(chunk.page_end > chunk.page_start for chunk in chunks),
+    }
+    if embed and texts:
+        start = time.perf_counter()
+        model.encode(texts, batch_size=64, normalize_embeddings=True, show_progress_bar=False)
+        report["embed_seconds"] = time.perf_counter() - start
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare per-page word chunking with the cross-page token chunker.")
+    parser.add_argument("files", nargs="+", help="PDF handbooks to chunk")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--overlap-tokens", type=int, default=32)
+    parser.add_argument("--min-tokens", type=int, default=64)
+    parser.add_argument("--embed", action="store_true", help="also time embedding every chunk")
+    parser.add_argument("--output-json")
+    args = parser.parse_args()
+
+    model = SentenceTransformer(args.model, device="cpu")
+    # Same budget rule as worker/app/embeddings.token_budget.
+    budget = min(args.max_tokens, model.max_seq_length - 2)
+
+    def token_lengths(words: list[str]) -> list[int]:
+        if not words:
+            return []
+        return [max(1, len(ids)) for ids in model.tokenizer(words, add_special_tokens=False)["input_ids"]]
+
+    report = {"model": args.model, "token_budget": budget, "files": {}}
+    for file_path in args.files:
+        sections = load_sections(file_path)
+
+        start = time.perf_counter()
+        baseline = per_section_chunks(sections)
+        baseline_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        candidate = list(
+            chunk_document(
+                sections,
+                max_tokens=budget,
+                overlap_tokens=args.overlap_tokens,
+                min_tokens=args.min_tokens,
+                token_lengths=token_lengths,
+            )
+        )
+        candidate_seconds = time.perf_counter() - start
+
+        report["files"][file_path] = {
+            "pages": len({page_number for page_number, _, _ in sections}),
+            "per_section": summarize(baseline, baseline_seconds, model, budget, args.min_tokens, args.embed),
+            "cross_page": summarize(candidate, candidate_seconds, model, budget, args.min_tokens, args.embed),
+        }
+
+    print(json.dumps(report, indent=2))
+    if args.output_json:
+        with open(args.output_json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,123 @@
+﻿# scripts/bench_reranker.py
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+
+from sentence_transformers import CrossEncoder
+
+
+def load_model(model_name: str, backend: str, max_length: int | None) -> CrossEncoder:
+    if backend == "onnx":
+        return CrossEncoder(model_name, max_length=max_length, backend="onnx")
+    model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+    if backend == "int8":
+        import torch
+
+        model.model = torch.quantization.quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def truncate(text: str, max_words: int | None) -> str:
+    if not max_words:
+        return text
+    return " ".join(text.split()[:max_words])
+
+
+def kendall_tau(left: list[int], right: list[int]) -> float:
+    position = {item: index for index, item in enumerate(right)}
+    ranks = [position[item] for item in left]
+    concordant = discordant = 0
+    for i in range(len(ranks)):
+        for j in range(i + 1, len(ranks)):
+            if ranks[i] < ranks[j]:
+                concordant += 1
+            else:
+                discordant += 1
+    pairs = concordant + discordant
+    return (concordant - discordant) / pairs if pairs else 1.0
+
+
+def score_queries(
+    model: CrossEncoder,
+    items: list[dict],
+    max_words: int | None,
+    batch_size: int,
+) -> tuple[list[list[int]], list[float]]:
+    rankings = []
+    latencies = []
+    for item in items:
+        pairs = [(item["query"], truncate(passage, max_words)) for passage in item["passages"]]
+        start = time.perf_counter()
+        scores = model.predict(pairs, batch_size=batch_size, show_progress_bar=False)
+        latencies.append(time.perf_counter() - start)
+        rankings.append(sorted(range(len(pairs)), key=lambda index: float(scores[index]), reverse=True))
+    return rankings, latencies
+
+
+def summarize(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {"mean_ms": statistics.mean(ordered) * 1000, "p50_ms": statistics.median(ordered) * 1000, "p95_ms": p95 * 1000}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare a reranker configuration against the default model.")
+    parser.add_argument("--input", required=True, help="JSON list of {query, passages[]} objects")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--backend", choices=["torch", "int8", "onnx"], default="int8")
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--output-json")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as handle:
+        items = [item for item in json.load(handle) if item.get("passages")]
+    if not items:
+        print("no queries with passages in input")
+        return 1
+
+    baseline = load_model(args.model, "torch", None)
+    candidate = load_model(args.model, args.backend, args.max_length)
+
+    # One warm-up pass each so lazy initialisation doesn't skew the first query.
+    score_queries(baseline, items[:1], None, 32)
+    score_queries(candidate, items[:1], args.max_length, args.batch_size)
+
+    baseline_rankings, baseline_latencies = score_queries(baseline, items, None, 32)
+    candidate_rankings, candidate_latencies = score_queries(candidate, items, args.max_length, args.batch_size)
+
+    taus = []
+    overlaps = []
+    for left, right in zip(baseline_rankings, candidate_rankings, strict=True):
+        taus.append(kendall_tau(left, right))
+        top_n = min(args.top_n, len(left))
+        overlaps.append(len(set(left[:top_n]) & set(right[:top_n])) / top_n)
+
+    report = {
+        "model": args.model,
+        "queries": len(items),
+        "baseline": summarize(baseline_latencies),
+        "candidate": {
+            "backend": args.backend,
+            "max_length": args.max_length,
+            "batch_size": args.batch_size,
+            **summarize(candidate_latencies),
+        },
+        "agreement": {
+            "kendall_tau_mean": statistics.mean(taus),
+            f"top_{args.top_n}_overlap_mean": statistics.mean(overlaps),
+        },
+    }
+    print(json.dumps(report, indent=2))
+    if args.output_json:
+        with open(args.output_json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
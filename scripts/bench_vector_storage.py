@@ -0,0 +1,146 @@
+﻿# scripts/bench_vector_storage.py
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+import psycopg
+from pgvector.psycopg import register_vector
+
+# Mirrors the first-pass ordering in backend/app/services/retrieval.py.
+ORDER_BY = {
+    "vector": "vector <-> %(vector)s",
+    "halfvec": "vector::halfvec({dim}) <-> %(vector)s::halfvec({dim})",
+    "binary": "binary_quantize(vector)::bit({dim}) <~> binary_quantize(%(vector)s)",
+}
+
+INDEXES = {
+    "vector": "idx_embeddings_vector_active",
+    "halfvec": "idx_embeddings_halfvec_active",
+    "binary": "idx_embeddings_binary_active",
+}
+
+SAMPLE_SQL = """
+    SELECT vector FROM embeddings WHERE is_active ORDER BY random() LIMIT %(queries)s
+"""
+
+
+def normalize_dsn(dsn: str) -> str:
+    if dsn.startswith("postgresql+psycopg://"):
+        return dsn.replace("postgresql+psycopg://", "postgresql://", 1)
+    return dsn
+
+
+def search_sql(storage: str, dim: int) -> str:
+    order_by = ORDER_BY[storage].format(dim=dim)
+    if storage == "vector":
+        return f"""
+            SELECT chunk_id FROM embeddings WHERE is_active
+            ORDER BY {order_by} LIMIT %(top_k)s
+        """
+    return f"""
+        SELECT chunk_id FROM (
+            SELECT chunk_id, vector <-> %(vector)s AS distance
+            FROM embeddings WHERE is_active
+            ORDER BY {order_by} LIMIT %(rescore_limit)s
+        ) AS shortlist
+        ORDER BY distance LIMIT %(top_k)s
+    """
+
+
+def run_queries(
+    conn: psycopg.Connection,
+    sql: str,
+    queries: list,
+    params: dict,
+    exact: bool,
+    ef_search: int,
+) -> tuple[list[list[str]], list[float]]:
+    results = []
+    latencies = []
+    with conn.cursor() as cur:
+        for vector in queries:
+            with conn.transaction():
+                cur.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(ef_search),))
+                if exact:
+                    cur.execute("SET LOCAL enable_indexscan = off")
+                start = time.perf_counter()
+                cur.execute(sql, {**params, "vector": vector})
+                rows = cur.fetchall()
+                latencies.append(time.perf_counter() - start)
+            results.append([str(row[0]) for row in rows])
+    return results, latencies
+
+
+def summarize(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {"mean_ms": statistics.mean(ordered) * 1000, "p50_ms": statistics.median(ordered) * 1000, "p95_ms": p95 * 1000}
+
+
+def index_size(conn: psycopg.Connection, name: str) -> int | None:
+    row = conn.execute("SELECT pg_relation_size(to_regclass(%s))", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare recall and latency of compact vector indexes.")
+    parser.add_argument("--queries", type=int, default=100, help="active embeddings sampled as query vectors")
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--ef-search", type=int, default=100)
+    parser.add_argument("--storage", nargs="+", choices=list(ORDER_BY), default=list(ORDER_BY))
+    parser.add_argument("--output-json")
+    args = parser.parse_args()
+
+    dsn = os.environ.get("DATABASE_URL")
+    if not dsn:
+        print("DATABASE_URL is required")
+        return 1
+
+    params = {"top_k": args.top_k, "rescore_limit": args.top_k * args.rescore_factor}
+    with psycopg.connect(normalize_dsn(dsn)) as conn:
+        register_vector(conn)
+        queries = [row[0] for row in conn.execute(SAMPLE_SQL, {"queries": args.queries}).fetchall()]
+        if not queries:
+            print("no active embeddings to sample")
+            return 1
+
+        truth, exact_latencies = run_queries(conn, search_sql("vector", args.dim), queries, params, True, args.ef_search)
+        report = {
+            "queries": len(queries),
+            "top_k": args.top_k,
+            "rescore_factor": args.rescore_factor,
+            "exact": summarize(exact_latencies),
+            "storage": {},
+        }
+        for storage in args.storage:
+            if index_size(conn, INDEXES[storage]) is None:
+                # Without its index the layout would be timed as a sequential scan.
+                print(f"skipping {storage}: run scripts/set_vector_index.py {storage} --keep-others first")
+                continue
+            sql = search_sql(storage, args.dim)
+            # One warm-up pass so the index pages are cached for every layout.
+            run_queries(conn, sql, queries[:1], params, False, args.ef_search)
+            found, latencies = run_queries(conn, sql, queries, params, False, args.ef_search)
+            recalls = [len(set(left) & set(right)) / len(left) for left, right in zip(truth, found) if left]
+            report["storage"][storage] = {
+                "index": INDEXES[storage],
+                "index_bytes": index_size(conn, INDEXES[storage]),
+                f"recall_at_{args.top_k}": statistics.mean(recalls),
+                **summarize(latencies),
+            }
+
+    print(json.dumps(report, indent=2))
+    if args.output_json:
+        with open(args.output_json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
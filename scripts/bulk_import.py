@@ -0,0 +1,133 @@
+﻿# scripts/bulk_import.py
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from pathlib import Path
+from typing import Iterator
+from uuid import uuid4
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def build_archive(directory: Path, manifest_path: Path, target: Path) -> tuple[int, list[str]]:
+    # The manifest's "file" column is resolved relative to the directory and
+    # stored under the same name, which is what the endpoint looks up.
+    with manifest_path.open("r", encoding="utf-8-sig", newline="") as handle:
+        files = [row["file"].strip() for row in csv.DictReader(handle) if (row.get("file") or "").strip()]
+    missing = [name for name in files if not (directory / name).is_file()]
+    if missing:
+        return 0, missing
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_STORED) as archive:
+        archive.write(manifest_path, "manifest.csv")
+        for name in files:
+            archive.write(directory / name, name)
+    return len(files), []
+
+
+def multipart_body(archive_path: Path, fields: dict[str, str], boundary: str) -> tuple[Iterator[bytes], int]:
+    head = b""
+    for name, value in fields.items():
+        head += (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n"
+        ).encode("utf-8")
+    head += (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"archive\"; filename=\"{archive_path.name}\"\r\n"
+        "Content-Type: application/zip\r\n\r\n"
+    ).encode("utf-8")
+    tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+    def chunks() -> Iterator[bytes]:
+        # Streamed so a large archive is never held in memory.
+        yield head
+        with archive_path.open("rb") as handle:
+            while chunk := handle.read(CHUNK_SIZE):
+                yield chunk
+        yield tail
+
+    return chunks(), len(head) + archive_path.stat().st_size + len(tail)
+
+
+def upload(base_url: str, token: str, archive_path: Path, institution: str | None, timeout: float) -> dict:
+    boundary = uuid4().hex
+    fields = {"institution": institution} if institution else {}
+    body, length = multipart_body(archive_path, fields, boundary)
+    req = urllib.request.Request(
+        f"{base_url}/admin/imports",
+        data=body,
+        headers={
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+            "Content-Length": str(length),
+            "X-Admin-Token": token,
+        },
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def get_progress(base_url: str, token: str, batch_id: str) -> dict:
+    req = urllib.request.Request(f"{base_url}/admin/imports/{batch_id}", headers={"X-Admin-Token": token})
+    with urllib.request.urlopen(req, timeout=30) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk import a directory of documents described by a CSV manifest.")
+    parser.add_argument("--dir", required=True, help="directory containing the files listed in the manifest")
+    parser.add_argument("--manifest", help="CSV manifest (default: <dir>/manifest.csv)")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--admin-token", default=os.environ.get("ADMIN_TOKEN"))
+    parser.add_argument("--institution", help="default institution for rows that leave it empty")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--wait", action="store_true", help="poll until every ingestion job has finished")
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if not args.admin_token:
+        print("--admin-token or ADMIN_TOKEN is required")
+        return 1
+    directory = Path(args.dir)
+    manifest_path = Path(args.manifest) if args.manifest else directory / "manifest.csv"
+
+    with tempfile.TemporaryDirectory() as scratch:
+        archive_path = Path(scratch) / f"{directory.resolve().name or 'import'}.zip"
+        count, missing = build_archive(directory, manifest_path, archive_path)
+        if missing:
+            print("files listed in the manifest but not found:")
+            for name in missing:
+                print(f"  {name}")
+            return 1
+        print(f"uploading {count} documents ({archive_path.stat().st_size / 1e6:.1f} MB)")
+        try:
+            result = upload(args.base_url, args.admin_token, archive_path, args.institution, args.timeout)
+        except urllib.error.HTTPError as exc:
+            print(f"import rejected ({exc.code}): {exc.read().decode('utf-8', 'replace')}")
+            return 1
+
+    batch_id = result["import_batch_id"]
+    print(f"import batch {batch_id}: {result['documents_total']} documents queued")
+    if not args.wait:
+        return 0
+
+    while True:
+        progress = get_progress(args.base_url, args.admin_token, batch_id)
+        print(
+            f"{progress['progress']:.0%} done: {progress['completed']} completed, {progress['failed']} failed, "
+            f"{progress['processing']} processing, {progress['queued']} queued"
+        )
+        if progress["done"]:
+            for failure in progress["failures"]:
+                print(f"  failed job {failure['id']}: {failure['error_message']}")
+            return 1 if progress["failed"] else 0
+        time.sleep(args.poll_interval)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
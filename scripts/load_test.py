@@ -0,0 +1,261 @@
+﻿# scripts/load_test.py
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Sample:
+    operation: str
+    scheduled_at: float
+    latency: float
+    ok: bool
+    status: int | None = None
+    error: str | None = None
+    stages: dict[str, float] = field(default_factory=dict)
+
+
+def parse_server_timing(header: str | None) -> dict[str, float]:
+    # "embed;dur=12.1, sql;desc=\"pgvector\";dur=40" -> {"embed": 12.1, "sql": 40.0}
+    stages: dict[str, float] = {}
+    if not header:
+        return stages
+    for metric in header.split(","):
+        name, *params = [part.strip() for part in metric.split(";")]
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "dur" and name:
+                try:
+                    stages[f"server.{name}"] = float(value.strip('"'))
+                except ValueError:
+                    pass
+    return stages
+
+
+def post(url: str, payload: dict, timeout: float) -> tuple[int, dict, dict[str, float]]:
+    data = json.dumps(payload).encode("utf-8")
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        body = json.loads(response.read().decode("utf-8"))
+        return response.status, body, parse_server_timing(response.headers.get("Server-Timing"))
+
+
+def post_stream(url: str, payload: dict, timeout: float) -> tuple[int, float, dict[str, float]]:
+    # Returns the time to the first SSE event alongside the status; the body is
+    # drained until the "done" or "error" event.
+    data = json.dumps(payload).encode("utf-8")
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    first_event = None
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        for raw_line in response:
+            line = raw_line.decode("utf-8").strip()
+            if line.startswith("event:"):
+                first_event = first_event or time.perf_counter() - start
+                if line == "event: error":
+                    raise RuntimeError("stream_error_event")
+        return response.status, first_event or time.perf_counter() - start, parse_server_timing(response.headers.get("Server-Timing"))
+
+
+class Workload:
+    def __init__(self, args: argparse.Namespace, questions: list[str]) -> None:
+        self.args = args
+        self.questions = questions
+        self.random = random.Random(args.seed)
+        self.lock = threading.Lock()
+
+    def next_request(self) -> tuple[str, str]:
+        with self.lock:
+            operation = "search" if self.random.random() < self.args.search_ratio else "chat"
+            return operation, self.random.choice(self.questions)
+
+    def run(self, operation: str, question: str, scheduled_at: float) -> Sample:
+        base_url = self.args.base_url
+        stages: dict[str, float] = {}
+        try:
+            if operation == "search":
+                payload = {"query": question, "top_k": self.args.top_k, "retrieval_mode": self.args.retrieval_mode}
+                status, _, server_stages = post(f"{base_url}/search", payload, self.args.timeout)
+            else:
+                stage_start = time.perf_counter()
+                _, conversation, _ = post(f"{base_url}/chat/conversations", {}, self.args.timeout)
+                stages["client.create_conversation"] = (time.perf_counter() - stage_start) * 1000
+                url = f"{base_url}/chat/conversations/{conversation['id']}/messages"
+                payload = {"content": question, "top_k": self.args.top_k, "retrieval_mode": self.args.retrieval_mode}
+                if self.args.stream:
+                    status, first_event, server_stages = post_stream(f"{url}/stream", payload, self.args.timeout)
+                    stages["client.first_event"] = first_event * 1000
+                else:
+                    status, _, server_stages = post(url, payload, self.args.timeout)
+            stages.update(server_stages)
+            return Sample(operation, scheduled_at, time.perf_counter() - scheduled_at, True, status, stages=stages)
+        except urllib.error.HTTPError as exc:
+            return Sample(operation, scheduled_at, time.perf_counter() - scheduled_at, False, exc.code, f"http_{exc.code}")
+        except Exception as exc:  # noqa: BLE001
+            return Sample(operation, scheduled_at, time.perf_counter() - scheduled_at, False, None, type(exc).__name__)
+
+
+def run_closed_loop(workload: Workload, concurrency: int, deadline: float) -> list[Sample]:
+    samples: list[Sample] = []
+    lock = threading.Lock()
+
+    def worker() -> None:
+        while time.perf_counter() < deadline:
+            operation, question = workload.next_request()
+            sample = workload.run(operation, question, time.perf_counter())
+            with lock:
+                samples.append(sample)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def run_open_loop(workload: Workload, concurrency: int, qps: float, deadline: float, seed: int) -> list[Sample]:
+    # Arrivals follow a Poisson process at the target rate. Latency is measured
+    # from the scheduled arrival, so time spent waiting for a free client slot
+    # counts against the server instead of being silently omitted.
+    arrivals = random.Random(seed + 1)
+    futures = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        next_at = time.perf_counter()
+        while next_at < deadline:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            operation, question = workload.next_request()
+            futures.append(pool.submit(workload.run, operation, question, next_at))
+            next_at += arrivals.expovariate(qps)
+    return [future.result() for future in futures]
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.mean(ordered),
+        "p50_ms": pick(0.50),
+        "p90_ms": pick(0.90),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1],
+    }
+
+
+def build_report(args: argparse.Namespace, samples: list[Sample], measured_seconds: float) -> dict:
+    by_operation: dict[str, list[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_operation[sample.operation].append(sample)
+
+    operations = {}
+    for operation, items in sorted(by_operation.items()):
+        stage_values: dict[str, list[float]] = defaultdict(list)
+        for sample in items:
+            for stage, value in sample.stages.items():
+                stage_values[stage].append(value)
+        ok = [sample for sample in items if sample.ok]
+        operations[operation] = {
+            "requests": len(items),
+            "errors": len(items) - len(ok),
+            "error_rate": (len(items) - len(ok)) / len(items),
+            "throughput_rps": len(ok) / measured_seconds,
+            "latency": percentiles([sample.latency * 1000 for sample in ok]),
+            "stages": {stage: percentiles(values) for stage, values in sorted(stage_values.items())},
+        }
+
+    ok_count = sum(1 for sample in samples if sample.ok)
+    return {
+        "config": {
+            "base_url": args.base_url,
+            "mode": "open" if args.qps else "closed",
+            "target_qps": args.qps or None,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "search_ratio": args.search_ratio,
+            "stream": args.stream,
+            "retrieval_mode": args.retrieval_mode,
+        },
+        "requests": len(samples),
+        "throughput_rps": ok_count / measured_seconds,
+        "error_rate": (len(samples) - ok_count) / len(samples) if samples else 0.0,
+        "errors": dict(Counter(sample.error for sample in samples if not sample.ok)),
+        "latency": percentiles([sample.latency * 1000 for sample in samples if sample.ok]),
+        "operations": operations,
+    }
+
+
+def load_questions(path: str | None, fallback: list[str]) -> list[str]:
+    if not path:
+        return fallback
+    with open(path, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    return [item["question_text"] if isinstance(item, dict) else str(item) for item in data]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Concurrent load test for /search and chat.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--input", help="eval set JSON (question_text items) or a JSON list of strings")
+    parser.add_argument("--question", action="append", default=[], help="question to use when --input is not given")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--qps", type=float, default=0.0, help="open-loop target rate; 0 runs closed-loop")
+    parser.add_argument("--duration", type=float, default=60.0, help="measured seconds, after warm-up")
+    parser.add_argument("--warmup", type=float, default=10.0)
+    parser.add_argument("--search-ratio", type=float, default=0.5, help="fraction of requests sent to /search")
+    parser.add_argument("--stream", action="store_true", help="use the streaming chat endpoint")
+    parser.add_argument("--retrieval-mode", choices=["vector", "hybrid"], default="vector")
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-json")
+    args = parser.parse_args()
+
+    questions = load_questions(args.input, args.question)
+    if not questions:
+        print("provide --input or at least one --question")
+        return 1
+
+    workload = Workload(args, questions)
+    start = time.perf_counter()
+    measure_from = start + args.warmup
+    deadline = measure_from + args.duration
+    if args.qps:
+        samples = run_open_loop(workload, args.concurrency, args.qps, deadline, args.seed)
+    else:
+        samples = run_closed_loop(workload, args.concurrency, deadline)
+
+    measured = [sample for sample in samples if sample.scheduled_at >= measure_from]
+    if not measured:
+        print("no requests completed after warm-up")
+        return 1
+
+    report = build_report(args, measured, args.duration)
+    print(json.dumps(report, indent=2))
+    if args.output_json:
+        with open(args.output_json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
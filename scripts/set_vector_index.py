@@ -0,0 +1,74 @@
+﻿# scripts/set_vector_index.py
+from __future__ import annotations
+
+import argparse
+import os
+
+import psycopg
+
+# The active-embeddings ANN index behind each VECTOR_INDEX mode. Exactly one
+# should exist: each HNSW graph costs memory and write time, and the compact
+# ones only pay off when they replace the full-precision graph.
+INDEXES = {
+    "vector": "idx_embeddings_vector_active",
+    "halfvec": "idx_embeddings_halfvec_active",
+    "binary": "idx_embeddings_binary_active",
+}
+# Table-wide full-precision graph from migration 0001; migration 0003 drops it,
+# but databases that have not re-run 0003 may still carry it.
+LEGACY_INDEXES = ("idx_embeddings_vector",)
+
+CREATE_SQL = {
+    "vector": "CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+    "ON embeddings USING hnsw (vector vector_l2_ops) WHERE is_active",
+    "halfvec": "CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+    "ON embeddings USING hnsw ((vector::halfvec({dim})) halfvec_l2_ops) WHERE is_active",
+    "binary": "CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+    "ON embeddings USING hnsw ((binary_quantize(vector)::bit({dim})) bit_hamming_ops) WHERE is_active",
+}
+
+DIM_SQL = "SELECT vector_dims(vector) FROM embeddings WHERE vector IS NOT NULL LIMIT 1"
+
+
+def normalize_dsn(dsn: str) -> str:
+    if dsn.startswith("postgresql+psycopg://"):
+        return dsn.replace("postgresql+psycopg://", "postgresql://", 1)
+    return dsn
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the ANN index for a VECTOR_INDEX mode and drop the others.")
+    parser.add_argument("index", choices=list(INDEXES))
+    parser.add_argument("--dim", type=int, help="embedding dimension; defaults to the stored vectors' dimension")
+    parser.add_argument("--keep-others", action="store_true", help="keep the other indexes (for benchmarking)")
+    args = parser.parse_args()
+
+    dsn = os.environ.get("DATABASE_URL")
+    if not dsn:
+        print("DATABASE_URL is required")
+        return 1
+
+    # CONCURRENTLY cannot run inside a transaction block.
+    with psycopg.connect(normalize_dsn(dsn), autocommit=True) as conn:
+        dim = args.dim
+        if dim is None:
+            row = conn.execute(DIM_SQL).fetchone()
+            if row is None:
+                print("no embeddings to read the dimension from; pass --dim")
+                return 1
+            dim = row[0]
+
+        print(f"building {INDEXES[args.index]} (dim {dim})")
+        conn.execute(CREATE_SQL[args.index].format(name=INDEXES[args.index], dim=dim))
+        if not args.keep_others:
+            others = [name for mode, name in INDEXES.items() if mode != args.index]
+            for name in [*others, *LEGACY_INDEXES]:
+                conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                print(f"dropped {name} if present")
+
+    print(f"set VECTOR_INDEX={args.index} and EMBEDDING_DIM={dim} for the backend")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,157 @@
+﻿# scripts/stub_llm.py
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SOURCE_ID_RE = re.compile(r"^- id: (\S+)$", re.MULTILINE)
+
+
+def build_answer(user_prompt: str) -> str:
+    source_ids = SOURCE_ID_RE.findall(user_prompt)
+    if not source_ids:
+        return json.dumps({"claims": [], "steps": None, "confidence": "abstain", "follow_up_questions": None})
+    claims = [
+        {"text": f"Stub claim supported by source {source_id}.", "citation_ids": [source_id]}
+        for source_id in source_ids[:3]
+    ]
+    return json.dumps(
+        {
+            "claims": claims,
+            "steps": ["Read the cited clause.", "Contact the relevant office."],
+            "confidence": "supported",
+            "follow_up_questions": None,
+        }
+    )
+
+
+def openai_response(payload: dict) -> dict:
+    user_prompt = payload["messages"][-1]["content"]
+    return {
+        "id": "stub",
+        "object": "chat.completion",
+        "model": payload.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": build_answer(user_prompt)}}],
+    }
+
+
+def split_tokens(text: str, size: int = 8) -> list[str]:
+    return [text[index : index + size] for index in range(0, len(text), size)]
+
+
+def openai_stream_events(payload: dict) -> list[str]:
+    user_prompt = payload["messages"][-1]["content"]
+    events = []
+    for piece in split_tokens(build_answer(user_prompt)):
+        chunk = {"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": piece}}]}
+        events.append(f"data: {json.dumps(chunk)}\n\n")
+    events.append("data: [DONE]\n\n")
+    return events
+
+
+def anthropic_stream_events(payload: dict) -> list[str]:
+    user_prompt = payload["messages"][-1]["content"]
+    events = []
+    for piece in split_tokens(build_answer(user_prompt)):
+        delta = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}}
+        events.append(f"event: content_block_delta\ndata: {json.dumps(delta)}\n\n")
+    events.append('event: message_stop\ndata: {"type": "message_stop"}\n\n')
+    return events
+
+
+def anthropic_response(payload: dict) -> dict:
+    user_prompt = payload["messages"][-1]["content"]
+    return {
+        "id": "stub",
+        "type": "message",
+        "model": payload.get("model"),
+        "content": [{"type": "text", "text": build_answer(user_prompt)}],
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency_seconds = 0.0
+    jitter_seconds = 0.0
+    token_delay_seconds = 0.0
+    error_rate = 0.0
+    error_status = 503
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length", "0"))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        is_openai = self.path.endswith("/chat/completions")
+        if not is_openai and not self.path.endswith("/messages"):
+            self.send_error(404)
+            return
+
+        time.sleep(self.latency_seconds + random.uniform(0.0, self.jitter_seconds))
+        if random.random() < self.error_rate:
+            self._send_json(self.error_status, {"error": {"type": "stub_error", "message": "injected failure"}})
+            return
+        if payload.get("stream"):
+            self._stream(openai_stream_events(payload) if is_openai else anthropic_stream_events(payload))
+            return
+
+        self._send_json(200, openai_response(payload) if is_openai else anthropic_response(payload))
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, events: list[str]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for event in events:
+            self.wfile.write(event.encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.token_delay_seconds)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        return
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra uniform random latency per request")
+    parser.add_argument("--token-delay-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    StubHandler.latency_seconds = args.latency_ms / 1000.0
+    StubHandler.jitter_seconds = args.jitter_ms / 1000.0
+    StubHandler.token_delay_seconds = args.token_delay_ms / 1000.0
+    StubHandler.error_rate = args.error_rate
+    StubHandler.error_status = args.error_status
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"stub llm listening on http://{args.host}:{args.port}")
+    print(f"  OPENAI_BASE_URL=http://{args.host}:{args.port}/v1/chat/completions")
+    print(f"  ANTHROPIC_BASE_URL=http://{args.host}:{args.port}/v1/messages")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,52 @@
+﻿# tests/test_batching.py
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "backend" / "app"))
+
+from services.batching import MicroBatcher  # type: ignore
+
+
+def test_batcher_coalesces_concurrent_submissions():
+    calls = []
+
+    def double(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=8, max_wait_ms=50)
+    futures = batcher.submit_many(list(range(5)))
+
+    assert [future.result(timeout=1) for future in futures] == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+    assert batcher.stats()["batch_sizes"] == {5: 1}
+    batcher.close()
+
+
+def test_batcher_respects_max_batch_size():
+    batcher = MicroBatcher(lambda items: list(items), max_batch_size=2, max_wait_ms=50)
+    futures = batcher.submit_many(["a", "b", "c"])
+
+    assert [future.result(timeout=1) for future in futures] == ["a", "b", "c"]
+    assert batcher.stats()["batches"] == 2
+    batcher.close()
+
+
+def test_batcher_propagates_errors_to_every_caller():
+    def fail(items):
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(fail, max_batch_size=4, max_wait_ms=10)
+    futures = batcher.submit_many([1, 2])
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            future.result(timeout=1)
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(3)
@@ -0,0 +1,49 @@
+﻿# tests/test_bulk_import.py
+from __future__ import annotations
+
+import sys
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "backend" / "app"))
+
+from services.bulk_import import parse_manifest  # type: ignore
+
+
+def test_manifest_rows_are_parsed_with_defaults():
+    manifest = (
+        "\ufefffile,title,version_label,institution,effective_date,categories\n"
+        "regs/a.pdf,Exam rules,2024,,2024-09-01,exams; appeals\n"
+        "b.pdf,Housing policy,v2,Other U,,\n"
+    )
+    rows, errors = parse_manifest(manifest, default_institution="Tech U")
+    assert errors == []
+    assert [row.file for row in rows] == ["regs/a.pdf", "b.pdf"]
+    assert rows[0].institution == "Tech U"
+    assert rows[0].effective_date == date(2024, 9, 1)
+    assert rows[0].categories == ["exams", "appeals"]
+    assert rows[1].institution == "Other U"
+    assert rows[1].categories is None and rows[1].effective_date is None
+
+
+def test_manifest_reports_every_problem():
+    manifest = (
+        "file,title,version_label,effective_date\n"
+        "a.pdf,A,1,2024-13-01\n"
+        "b.pdf,,1,\n"
+        "a.pdf,A again,2,\n"
+    )
+    rows, errors = parse_manifest(manifest)
+    assert [row.file for row in rows] == ["a.pdf"]
+    assert errors == [
+        "line 2: effective_date must be YYYY-MM-DD, got '2024-13-01'",
+        "line 3: title required",
+        "line 4: a.pdf listed more than once",
+    ]
+
+
+def test_manifest_requires_columns():
+    rows, errors = parse_manifest("file,title\nx.pdf,X\n")
+    assert rows == []
+    assert errors == ["manifest is missing columns: version_label"]
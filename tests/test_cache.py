@@ -0,0 +1,42 @@
+﻿# tests/test_cache.py
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "backend" / "app"))
+
+from services.cache import LRUCache, cache_key, normalize_query  # type: ignore
+
+
+def test_normalize_query_collapses_whitespace_and_case():
+    assert normalize_query("  How do I\tappeal\n a GRADE ") == "how do i appeal a grade"
+
+
+def test_cache_key_depends_on_every_part():
+    assert cache_key("emb", "model-a", "q") != cache_key("emb", "model-b", "q")
+    assert cache_key("emb", "model-a", "q").startswith("emb:")
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_expires_entries_after_ttl():
+    now = [0.0]
+    cache = LRUCache(maxsize=10, ttl_seconds=5, clock=lambda: now[0])
+    cache.set("a", 1)
+    now[0] = 4.0
+    assert cache.get("a") == 1
+    now[0] = 6.0
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
@@ -8,7 +8,7 @@ ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT / "worker" / "app"))
 
 from sectioning import extract_sections  # type: ignore
-from chunking import chunk_text  # type: ignore
+from chunking import chunk_document, chunk_text  # type: ignore
 
 
 def test_extract_sections_detects_heading():
@@ -24,3 +24,34 @@ def test_chunk_text_preserves_section_path():
     assert chunks
     assert all(chunk.section_path == "1.2 Scope" for chunk in chunks)
     assert all(chunk.page_start == 2 for chunk in chunks)
+
+
+def _words(count: int, prefix: str = "w") -> str:
+    return " ".join(f"{prefix}{index}" for index in range(count))
+
+
+def _one_token_each(words: list[str]) -> list[int]:
+    return [1] * len(words)
+
+
+def test_chunk_document_spans_pages_and_respects_budget():
+    sections = [(1, "1 Intro", _words(30, "a")), (2, None, _words(30, "b")), (3, None, _words(30, "c"))]
+    chunks = list(chunk_document(sections, max_tokens=40, overlap_tokens=5, token_lengths=_one_token_each))
+    assert all(len(chunk.text.split()) <= 40 for chunk in chunks)
+    assert (chunks[0].page_start, chunks[0].page_end) == (1, 2)
+    assert chunks[-1].page_end == 3
+    # Untitled text at the top of a page continues the previous section.
+    assert all(chunk.section_path == "1 Intro" for chunk in chunks)
+    # Consecutive chunks share the overlap words.
+    assert chunks[1].text.split()[:5] == chunks[0].text.split()[-5:]
+
+
+def test_chunk_document_merges_short_sections_forward():
+    sections = [(1, "1 Scope", _words(10, "a")), (1, "2 Terms", _words(50, "b")), (2, "3 Rules", _words(50, "c"))]
+    chunks = list(
+        chunk_document(sections, max_tokens=100, overlap_tokens=0, min_tokens=20, token_lengths=_one_token_each)
+    )
+    # The merged chunk is mostly "2 Terms", so it cites that section.
+    assert [chunk.section_path for chunk in chunks] == ["2 Terms", "3 Rules"]
+    assert len(chunks[0].text.split()) == 60
+    assert (chunks[1].page_start, chunks[1].page_end) == (2, 2)
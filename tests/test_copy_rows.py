@@ -0,0 +1,67 @@
+﻿# tests/test_copy_rows.py
+from __future__ import annotations
+
+import sys
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+from uuid import UUID, uuid4
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+from psycopg.adapt import Transformer  # noqa: E402
+from psycopg.pq import Format  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "worker" / "app"))
+
+from copy_rows import CHUNKS_COPY_TYPES, EMBEDDINGS_COPY_TYPES, chunk_rows, embedding_rows  # type: ignore  # noqa: E402
+
+
+def _dump(types: list[str], row: tuple) -> list:
+    # What Copy.set_types + Copy.write_row do for FORMAT BINARY.
+    transformer = Transformer()
+    registry = transformer.adapters.types
+    transformer.set_dumper_types([registry.get_oid(name) for name in types], Format.BINARY)
+    return transformer.dump_sequence(row, [Format.BINARY] * len(types))
+
+
+def _chunk() -> SimpleNamespace:
+    return SimpleNamespace(
+        text="Students may appeal within 14 days.",
+        page_start=3,
+        page_end=4,
+        section_path="2.1 Appeals",
+        excerpt="Students may appeal",
+        source_hash="abc",
+    )
+
+
+def test_chunk_rows_dump_with_binary_copy_types():
+    version_id = UUID(str(uuid4()))
+    row = next(chunk_rows(version_id, 0, [uuid4()], [_chunk()]))
+    dumped = _dump(CHUNKS_COPY_TYPES, row)
+    assert dumped[1] == version_id.bytes
+
+    # The task args carry the version id as text; the binary uuid dumper
+    # rejects that, which is why write_batch converts it first.
+    with pytest.raises(AttributeError):
+        _dump(CHUNKS_COPY_TYPES, (row[0], str(version_id), *row[2:]))
+
+
+def test_embedding_rows_dump_with_binary_copy_types():
+    version_id = uuid4()
+    filters = {
+        "institution": "Uni",
+        "language": "en",
+        "categories": ["appeals"],
+        "effective_date": date(2024, 9, 1),
+        "is_active": True,
+    }
+    row = next(embedding_rows(version_id, filters, [uuid4()], [[0.1, 0.2, 0.3]], "model"))
+    assert row[2] == 3
+    # pgvector registers "vector" per connection; float4[] stands in for it.
+    types = ["float4[]" if name == "vector" else name for name in EMBEDDINGS_COPY_TYPES]
+    dumped = _dump(types, row)
+    assert dumped[4] == version_id.bytes
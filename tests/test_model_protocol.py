@@ -0,0 +1,39 @@
+﻿# tests/test_model_protocol.py
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "backend" / "app"))
+
+from services.model_protocol import ModelServerError, encode_message, read_message  # type: ignore
+
+
+def _reader(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+def test_messages_round_trip_with_payloads():
+    async def scenario():
+        reader = _reader(encode_message({"op": "embed", "texts": ["a"]}) + encode_message({"ok": True}, b"\x00" * 8))
+        return [await read_message(reader) for _ in range(3)]
+
+    first, second, end = asyncio.run(scenario())
+    assert first == ({"op": "embed", "texts": ["a"]}, b"")
+    assert second == ({"ok": True}, b"\x00" * 8)
+    assert end is None
+
+
+def test_truncated_message_is_an_error():
+    async def scenario():
+        await read_message(_reader(encode_message({"op": "status"})[:3]))
+
+    with pytest.raises(ModelServerError):
+        asyncio.run(scenario())
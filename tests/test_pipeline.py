@@ -0,0 +1,62 @@
+﻿# tests/test_pipeline.py
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "worker" / "app"))
+
+from pipeline import StageTimings, batched, prefetch  # type: ignore
+
+
+def test_batched_keeps_order_and_tail():
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_prefetch_preserves_order_across_stages():
+    stage = prefetch(batched(prefetch(range(100), 2), 10), 2)
+    assert [item for batch in stage for item in batch] == list(range(100))
+
+
+def test_prefetch_reraises_producer_error():
+    def failing():
+        yield 1
+        raise RuntimeError("boom")
+
+    stage = prefetch(failing(), 1)
+    assert next(stage) == 1
+    with pytest.raises(RuntimeError, match="boom"):
+        next(stage)
+
+
+def test_prefetch_bounds_read_ahead():
+    produced = []
+
+    def source():
+        for item in range(50):
+            produced.append(item)
+            yield item
+
+    stage = prefetch(source(), 3)
+    assert next(stage) == 0
+    time.sleep(0.3)
+    assert len(produced) <= 5
+    stage.close()
+
+
+def test_stage_timings_exclude_nested_waits():
+    def slow_source():
+        for item in range(3):
+            time.sleep(0.05)
+            yield item
+
+    timings = StageTimings()
+    outer = timings.timed((item * 2 for item in timings.timed(slow_source(), "wait")), "work")
+    assert list(outer) == [0, 2, 4]
+    assert timings.seconds("wait") >= 0.15
+    assert timings.seconds("work") < 0.05
+    assert set(timings.as_milliseconds()) == {"wait", "work"}
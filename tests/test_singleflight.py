@@ -0,0 +1,47 @@
+﻿# tests/test_singleflight.py
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "backend" / "app"))
+
+from services.singleflight import SingleFlight  # type: ignore
+
+
+def test_concurrent_callers_share_one_computation():
+    flights = SingleFlight()
+    calls = []
+
+    async def request(key):
+        future = flights.claim(key)
+        if future is None:
+            return await asyncio.shield(flights.join(key))
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        future.set_result(f"answer for {key}")
+        return future.result()
+
+    async def run():
+        return await asyncio.gather(*(request("q") for _ in range(5)), request("other"))
+
+    results = asyncio.run(run())
+    assert results == ["answer for q"] * 5 + ["answer for other"]
+    assert calls == ["q", "other"]
+    assert flights.stats() == {"in_flight": 0, "leaders": 2, "followers": 4}
+
+
+def test_key_is_released_once_resolved():
+    flights = SingleFlight()
+
+    async def run():
+        first = flights.claim("q")
+        assert flights.claim("q") is None
+        first.set_result(None)
+        await asyncio.sleep(0)
+        return flights.claim("q")
+
+    assert asyncio.run(run()) is not None
+    assert len(flights) == 1
@@ -0,0 +1,51 @@
+﻿# tests/test_stream_parser.py
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "backend" / "app"))
+
+from services.stream_parser import AnswerStreamParser  # type: ignore
+
+ANSWER = {
+    "claims": [
+        {"text": 'Appeals use form "4.2.1" {within} [30] days.', "citation_ids": ["a"]},
+        {"text": "Reservists get extra attempts.", "citation_ids": ["a", "b"]},
+    ],
+    "steps": ["Fill in the form.", "Submit it, with \\ escapes."],
+    "confidence": "supported",
+    "follow_up_questions": ["Which faculty?"],
+}
+
+
+def test_parser_emits_items_as_soon_as_complete():
+    raw = json.dumps(ANSWER)
+    first_claim_end = raw.index('["a"]}') + len('["a"]}')
+    parser = AnswerStreamParser()
+
+    assert parser.feed(raw[: first_claim_end - 1]) == []
+    assert parser.feed(raw[first_claim_end - 1 : first_claim_end]) == [("claim", ANSWER["claims"][0])]
+
+
+def test_parser_handles_arbitrary_split_points():
+    raw = json.dumps(ANSWER, indent=2)
+    parser = AnswerStreamParser()
+    events = []
+    for index in range(0, len(raw), 3):
+        events.extend(parser.feed(raw[index : index + 3]))
+
+    assert events == [
+        ("claim", ANSWER["claims"][0]),
+        ("claim", ANSWER["claims"][1]),
+        ("step", ANSWER["steps"][0]),
+        ("step", ANSWER["steps"][1]),
+    ]
+    assert json.loads(parser.text) == ANSWER
+
+
+def test_parser_ignores_other_arrays():
+    parser = AnswerStreamParser()
+    assert parser.feed(json.dumps({"follow_up_questions": ["x"], "confidence": "abstain"})) == []
@@ -0,0 +1,68 @@
+﻿# tests/test_timing.py
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "backend" / "app"))
+
+from services.timing import (  # type: ignore
+    add_stage_observer,
+    current_timings,
+    stage,
+    start_request_timings,
+    timed_stage,
+)
+
+
+def test_stages_accumulate_on_the_request_timings():
+    async def handler():
+        timings = start_request_timings()
+        with stage("sql"):
+            pass
+        with stage("sql"):
+            pass
+        with stage("embed"):
+            pass
+        return timings
+
+    timings = asyncio.run(handler())
+    assert list(timings.durations) == ["sql", "embed"]
+    header = timings.server_timing()
+    assert header.startswith("sql;dur=")
+    assert "embed;dur=" in header and header.split(", ")[-1].startswith("total;dur=")
+
+
+def test_timed_stage_reports_to_observers_without_request_timings():
+    observed = []
+    add_stage_observer(lambda name, seconds: observed.append((name, seconds)))
+
+    @timed_stage("llm")
+    async def call():
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def run():
+        assert current_timings() is None
+        return await call()
+
+    assert asyncio.run(run()) == "ok"
+    assert [name for name, _ in observed] == ["llm"]
+    assert observed[0][1] >= 0.01
+
+
+def test_request_timings_are_isolated_per_task():
+    async def request(name):
+        timings = start_request_timings()
+        await asyncio.sleep(0)
+        with stage(name):
+            await asyncio.sleep(0)
+        return timings.durations
+
+    async def run():
+        return await asyncio.gather(asyncio.create_task(request("a")), asyncio.create_task(request("b")))
+
+    first, second = asyncio.run(run())
+    assert list(first) == ["a"] and list(second) == ["b"]
@@ -0,0 +1,111 @@
+﻿# tests/test_write_behind.py
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "backend" / "app"))
+
+from services.write_behind import WriteBehindQueue  # type: ignore
+
+
+def test_items_are_flushed_in_order_and_in_batches():
+    flushed = []
+
+    async def flush(items):
+        flushed.append(list(items))
+
+    async def run():
+        queue = WriteBehindQueue(flush, maxsize=100, batch_size=4, flush_interval_ms=20)
+        queue.start()
+        for item in range(10):
+            await queue.put(item)
+        await queue.close()
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    assert [item for batch in flushed for item in batch] == list(range(10))
+    assert max(len(batch) for batch in flushed) <= 4
+    assert stats["flushed"] == 10 and stats["pending"] == 0
+
+
+def test_put_waits_while_queue_is_full():
+    release = None
+
+    async def flush(items):
+        await release.wait()
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        queue = WriteBehindQueue(flush, maxsize=2, batch_size=1, flush_interval_ms=0)
+        queue.start()
+        await queue.put(0)
+        await asyncio.sleep(0.01)  # the flusher takes item 0 and blocks
+        await queue.put(1)
+        await queue.put(2)
+        blocked = asyncio.create_task(queue.put(3))
+        await asyncio.sleep(0.01)
+        was_blocked = not blocked.done()
+        release.set()
+        await blocked
+        await queue.close()
+        return was_blocked, queue.stats()
+
+    was_blocked, stats = asyncio.run(run())
+    assert was_blocked
+    assert stats["full_waits"] == 1 and stats["flushed"] == 4
+
+
+def test_failed_batches_are_retried_then_dropped():
+    attempts = []
+
+    async def flush(items):
+        attempts.append(list(items))
+        if items == ["bad"] or len(attempts) == 1:
+            raise RuntimeError("write failed")
+
+    async def run():
+        queue = WriteBehindQueue(flush, maxsize=10, batch_size=1, flush_interval_ms=0, max_retries=1)
+        queue.start()
+        await queue.put("good")
+        await queue.put("bad")
+        await queue.close()
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    assert attempts == [["good"], ["good"], ["bad"], ["bad"]]
+    assert stats["flushed"] == 1 and stats["dropped"] == 1 and stats["retries"] == 2
+
+
+def test_join_waits_only_for_items_enqueued_before_the_call():
+    async def flush(items):
+        await asyncio.sleep(0.002)
+
+    async def run():
+        # The producer keeps the queue full, so Queue.join would never return.
+        queue = WriteBehindQueue(flush, maxsize=100, batch_size=20, flush_interval_ms=1)
+        queue.start()
+        stop = asyncio.Event()
+
+        async def produce():
+            item = 0
+            while not stop.is_set():
+                await queue.put(item)
+                item += 1
+                await asyncio.sleep(0)
+
+        producer = asyncio.create_task(produce())
+        await asyncio.sleep(0.01)
+        watermark = queue.stats()["enqueued"]
+        await asyncio.wait_for(queue.join(), 1.0)
+        flushed = queue.stats()["flushed"]
+        stop.set()
+        await producer
+        await queue.close()
+        return watermark, flushed
+
+    watermark, flushed = asyncio.run(run())
+    assert flushed >= watermark
@@ -2,8 +2,10 @@
 from __future__ import annotations
 
 from celery import Celery
+from celery.signals import worker_process_shutdown
 
 from app.config import settings
+from app.db import close_pool
 
 celery_app = Celery(
     "worker",
@@ -11,4 +13,19 @@ celery_app = Celery(
     backend=settings.redis_url,
 )
 
+# Ingestion tasks are long and CPU-bound: reserve one task per process at a
+# time so queued ranges go to idle workers, and only acknowledge a task once
+# it finished so a crashed worker's range is redelivered (ingestion replaces
+# any partial output for its pages).
+celery_app.conf.update(
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+)
+
 celery_app.autodiscover_tasks(["app"])
+
+
+@worker_process_shutdown.connect
+def _close_db_pool(**_kwargs) -> None:
+    close_pool()
@@ -2,6 +2,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+
+# Maps a list of words to the number of tokenizer tokens each one costs.
+TokenLengths = Callable[[list[str]], list[int]]
 
 
 @dataclass
@@ -40,3 +44,79 @@ def chunk_text(
             break
         start = max(0, end - overlap)
     return chunks
+
+
+def approximate_token_lengths(words: list[str]) -> list[int]:
+    # Rough subword estimate for callers without the model's tokenizer.
+    return [max(1, (len(word) + 3) // 4) for word in words]
+
+
+def chunk_document(
+    sections: Iterable[tuple[int, str | None, str]],
+    max_tokens: int,
+    overlap_tokens: int = 32,
+    min_tokens: int = 64,
+    token_lengths: TokenLengths = approximate_token_lengths,
+) -> Iterator[Chunk]:
+    # One pass over the (page_number, section_path, text) stream of a whole
+    # document. Chunks run across page breaks and are cut before they would
+    # exceed max_tokens. A section change starts a new chunk unless the open
+    # chunk is still below min_tokens, so short tails and headings are merged
+    # into what follows instead of becoming their own embeddings. A chunk is
+    # labelled with the section that contributes most of its tokens, so a
+    # merged heading cites the section its text actually comes from.
+    if overlap_tokens >= max_tokens:
+        raise ValueError("overlap_tokens must be smaller than max_tokens")
+
+    # (word, tokens, page, section) for the open chunk; the first `carried`
+    # entries are overlap repeated from the previous chunk.
+    words: list[tuple[str, int, int, str | None]] = []
+    total = 0
+    carried = 0
+    current_section: str | None = None
+
+    def emit() -> Chunk:
+        weights: dict[str | None, int] = {}
+        for _, length, _, section in words:
+            weights[section] = weights.get(section, 0) + length
+        # Ties go to the later section, the one short text was merged into.
+        section_path = max(reversed(weights.items()), key=lambda item: item[1])[0]
+        return Chunk(
+            text=" ".join(word for word, _, _, _ in words),
+            page_start=words[0][2],
+            page_end=words[-1][2],
+            section_path=section_path,
+        )
+
+    for page_number, section_path, text in sections:
+        # Pages restart section detection, so text before the first heading
+        # on a page continues the previous page's section.
+        if section_path is not None and section_path != current_section:
+            current_section = section_path
+            if len(words) > carried and total >= min_tokens:
+                yield emit()
+                words, total, carried = [], 0, 0
+            elif len(words) == carried:
+                words, total, carried = [], 0, 0
+
+        section_words = text.split()
+        for word, length in zip(section_words, token_lengths(section_words), strict=True):
+            length = min(length, max_tokens)
+            if total + length > max_tokens:
+                if len(words) > carried:
+                    yield emit()
+                    kept = 0
+                    start = len(words)
+                    while start > 0 and kept + words[start - 1][1] <= overlap_tokens:
+                        start -= 1
+                        kept += words[start][1]
+                    words = words[start:]
+                    total, carried = kept, len(words)
+                if total + length > max_tokens:
+                    # No room next to the overlap; start clean.
+                    words, total, carried = [], 0, 0
+            words.append((word, length, page_number, current_section))
+            total += length
+
+    if len(words) > carried:
+        yield emit()
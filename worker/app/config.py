@@ -13,6 +13,24 @@ class Settings(BaseSettings):
     llm_provider: str
     llm_model: str
     llm_api_key: str
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 4
+    db_pool_max_lifetime: float = 3600.0
+    db_pool_max_idle: float = 600.0
+    db_pool_timeout: float = 30.0
+    ingest_batch_size: int = 64
+    ingest_queue_size: int = 4
+    # The only parse/embed parallelism across a document: longer documents fan
+    # out into one Celery subtask per range of this many pages, run by as many
+    # worker processes as the worker's concurrency allows (Celery's -c, one per
+    # CPU by default). Each task then runs serially apart from its pipeline
+    # stages. 0 keeps every document in a single task.
+    ingest_pages_per_task: int = 32
+    # Upper bound on chunk size; the embedding model's own sequence limit
+    # lowers it further (see embeddings.token_budget).
+    chunk_max_tokens: int = 256
+    chunk_overlap_tokens: int = 32
+    chunk_min_tokens: int = 64
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,80 @@
+﻿# worker/app/copy_rows.py
+from __future__ import annotations
+
+from typing import Iterator, Protocol, Sequence
+from uuid import UUID
+
+# Row layouts for the binary COPY in ingestion.write_batch. Kept free of
+# settings and DB imports so the dumping can be tested on its own. Binary
+# dumpers are strict: uuid columns need UUID objects, not strings.
+
+CHUNKS_COPY_SQL = """
+    COPY chunks (
+        id, document_version_id, chunk_index, page_start, page_end,
+        section_path, text, excerpt, source_hash
+    )
+    FROM STDIN WITH (FORMAT BINARY)
+"""
+CHUNKS_COPY_TYPES = ["uuid", "uuid", "int4", "int4", "int4", "text", "text", "text", "text"]
+
+# The filter columns are denormalised copies of the version metadata (see
+# migration 0003); supplying them here skips the per-row fill trigger.
+EMBEDDINGS_COPY_SQL = """
+    COPY embeddings (
+        chunk_id, model_name, embedding_dim, vector,
+        document_version_id, institution, language, categories, effective_date, is_active
+    )
+    FROM STDIN WITH (FORMAT BINARY)
+"""
+EMBEDDINGS_COPY_TYPES = ["uuid", "text", "int4", "vector", "uuid", "text", "text", "text[]", "date", "bool"]
+
+
+class ChunkLike(Protocol):
+    text: str
+    page_start: int
+    page_end: int
+    section_path: str | None
+    excerpt: str
+    source_hash: str
+
+
+def chunk_rows(
+    version_id: UUID,
+    first_index: int,
+    chunk_ids: Sequence[UUID],
+    chunks: Sequence[ChunkLike],
+) -> Iterator[tuple]:
+    for index, (chunk_id, chunk) in enumerate(zip(chunk_ids, chunks, strict=True), start=first_index):
+        yield (
+            chunk_id,
+            version_id,
+            index,
+            chunk.page_start,
+            chunk.page_end,
+            chunk.section_path,
+            chunk.text,
+            chunk.excerpt,
+            chunk.source_hash,
+        )
+
+
+def embedding_rows(
+    version_id: UUID,
+    version_filters: dict,
+    chunk_ids: Sequence[UUID],
+    vectors: Sequence,
+    model_name: str,
+) -> Iterator[tuple]:
+    for chunk_id, vector in zip(chunk_ids, vectors, strict=True):
+        yield (
+            chunk_id,
+            model_name,
+            len(vector),
+            vector,
+            version_id,
+            version_filters["institution"],
+            version_filters["language"],
+            version_filters["categories"],
+            version_filters["effective_date"],
+            version_filters["is_active"],
+        )
@@ -0,0 +1,31 @@
+﻿# worker/app/corpus.py
+from __future__ import annotations
+
+import logging
+
+import psycopg
+from redis import RedisError
+
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Must match backend/app/services/corpus.py.
+CORPUS_EPOCH_CHANNEL = "corpus:epoch"
+
+BUMP_EPOCH_SQL = "UPDATE corpus_state SET epoch = epoch + 1, updated_at = NOW() RETURNING epoch"
+INVALIDATE_ANSWERS_SQL = "DELETE FROM answer_cache WHERE corpus_key::BIGINT < %s"
+
+
+def bump_epoch(cur: psycopg.Cursor) -> int:
+    cur.execute(BUMP_EPOCH_SQL)
+    epoch = cur.fetchone()["epoch"]
+    cur.execute(INVALIDATE_ANSWERS_SQL, (epoch,))
+    return epoch
+
+
+def publish_epoch(epoch: int) -> None:
+    try:
+        redis_client.publish(CORPUS_EPOCH_CHANNEL, str(epoch))
+    except RedisError:
+        logger.warning("could not publish corpus epoch %s", epoch)
@@ -2,9 +2,12 @@
 from __future__ import annotations
 
 from contextlib import contextmanager
+from functools import lru_cache
 
 import psycopg
+from pgvector.psycopg import register_vector
 from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
 
 from app.config import settings
 
@@ -15,10 +18,38 @@ def _normalize_dsn(dsn: str) -> str:
     return dsn
 
 
+def _configure(conn: psycopg.Connection) -> None:
+    register_vector(conn)
+    conn.commit()
+
+
+@lru_cache(maxsize=1)
+def get_pool() -> ConnectionPool:
+    # Created lazily so each prefork child opens its own pool after the fork.
+    pool = ConnectionPool(
+        _normalize_dsn(settings.database_url),
+        kwargs={"row_factory": dict_row},
+        min_size=settings.db_pool_min_size,
+        max_size=settings.db_pool_max_size,
+        max_lifetime=settings.db_pool_max_lifetime,
+        max_idle=settings.db_pool_max_idle,
+        timeout=settings.db_pool_timeout,
+        configure=_configure,
+        check=ConnectionPool.check_connection,
+        name="worker",
+        open=False,
+    )
+    pool.open()
+    return pool
+
+
+def close_pool() -> None:
+    if get_pool.cache_info().currsize:
+        get_pool().close()
+        get_pool.cache_clear()
+
+
 @contextmanager
 def get_conn():
-    conn = psycopg.connect(_normalize_dsn(settings.database_url), row_factory=dict_row)
-    try:
+    with get_pool().connection() as conn:
         yield conn
-    finally:
-        conn.close()
@@ -1,6 +1,7 @@
 ﻿# worker/app/embeddings.py
 from __future__ import annotations
 
+import copy
 from functools import lru_cache
 
 import numpy as np
@@ -14,7 +15,30 @@ def _model() -> SentenceTransformer:
     return SentenceTransformer(settings.embeddings_model)
 
 
-def embed_texts(texts: list[str]) -> list[list[float]]:
+def embed_texts(texts: list[str]) -> np.ndarray:
+    # Rows go straight to the pgvector binary dumper; no list conversion.
     model = _model()
-    vectors = model.encode(texts, normalize_embeddings=True)
-    return [np.asarray(vector, dtype=float).tolist() for vector in vectors]
+    vectors = model.encode(texts, normalize_embeddings=True, show_progress_bar=False)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+@lru_cache(maxsize=1)
+def _tokenizer():
+    # A private copy: encode() reconfigures truncation on the model's
+    # tokenizer, which fails if the chunking thread is using it at the time.
+    return copy.deepcopy(_model().tokenizer)
+
+
+def token_budget() -> int:
+    # Tokens a chunk may use before the model truncates it; the special
+    # tokens added around every input count against max_seq_length.
+    limit = _model().max_seq_length
+    budget = settings.chunk_max_tokens
+    return min(budget, limit - 2) if limit else budget
+
+
+def token_lengths(words: list[str]) -> list[int]:
+    if not words:
+        return []
+    encoded = _tokenizer()(words, add_special_tokens=False)["input_ids"]
+    return [max(1, len(ids)) for ids in encoded]
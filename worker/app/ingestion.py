@@ -2,15 +2,60 @@
 from __future__ import annotations
 
 import hashlib
-from dataclasses import dataclass
-
-import fitz
-from pgvector.psycopg import Vector, register_vector
-
-from app.chunking import chunk_text
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+from uuid import UUID, uuid4
+
+import psycopg
+
+from app.chunking import chunk_document
+from app.config import settings
+from app.copy_rows import (
+    CHUNKS_COPY_SQL,
+    CHUNKS_COPY_TYPES,
+    EMBEDDINGS_COPY_SQL,
+    EMBEDDINGS_COPY_TYPES,
+    chunk_rows,
+    embedding_rows,
+)
 from app.db import get_conn
-from app.embeddings import embed_texts
-from app.sectioning import extract_sections
+from app.embeddings import embed_texts, token_budget, token_lengths
+from app.parsing import PageSections, iter_page_sections
+from app.pipeline import StageTimings, batched, prefetch
+
+logger = logging.getLogger(__name__)
+
+# Chunks whose text is unchanged from any earlier version reuse that version's
+# vector for the same model instead of being embedded again.
+REUSABLE_VECTORS_SQL = """
+    SELECT DISTINCT ON (chunks.source_hash) chunks.source_hash, embeddings.vector
+    FROM chunks
+    JOIN embeddings ON embeddings.chunk_id = chunks.id
+    WHERE chunks.source_hash = ANY(%s)
+      AND chunks.document_version_id <> %s
+      AND embeddings.model_name = %s
+"""
+
+# Re-running ingestion (a retried or redelivered task) replaces what an earlier
+# attempt wrote for the same pages; embeddings go with their chunks.
+DELETE_VERSION_CHUNKS_SQL = "DELETE FROM chunks WHERE document_version_id = %s"
+DELETE_PAGE_RANGE_CHUNKS_SQL = """
+    DELETE FROM chunks
+    WHERE document_version_id = %s AND page_start > %s AND page_start <= %s
+"""
+
+VERSION_FILTERS_SQL = """
+    SELECT
+        documents.institution,
+        document_versions.language,
+        document_versions.categories,
+        document_versions.effective_date,
+        document_versions.is_active
+    FROM document_versions
+    JOIN documents ON document_versions.document_id = documents.id
+    WHERE document_versions.id = %s
+"""
 
 
 @dataclass
@@ -23,93 +68,169 @@ class ParsedChunk:
     source_hash: str
 
 
-def parse_pdf(file_path: str) -> list[tuple[int, str]]:
-    doc = fitz.open(file_path)
-    pages = []
-    for page_number in range(len(doc)):
-        page = doc[page_number]
-        text = page.get_text("text")
-        pages.append((page_number + 1, text))
-    doc.close()
-    return pages
-
-
-def build_chunks(pages: list[tuple[int, str]]) -> list[ParsedChunk]:
-    parsed = []
-    for page_number, text in pages:
-        for section_path, section_text in extract_sections(text):
-            for chunk in chunk_text(section_text, page_number, section_path):
-                excerpt = chunk.text[:300]
-                source_hash = hashlib.sha256(chunk.text.encode("utf-8")).hexdigest()
-                parsed.append(
-                    ParsedChunk(
-                        text=chunk.text,
-                        page_start=chunk.page_start,
-                        page_end=chunk.page_end,
-                        section_path=chunk.section_path,
-                        excerpt=excerpt,
-                        source_hash=source_hash,
-                    )
-                )
-    return parsed
+@dataclass
+class IngestStats:
+    chunks: int = 0
+    reused: int = 0
+    stage_timings: dict[str, float] = field(default_factory=dict)
 
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused / self.chunks if self.chunks else 0.0
 
-def store_chunks(version_id: str, chunks: list[ParsedChunk]) -> list[str]:
-    if not chunks:
-        return []
 
-    chunk_ids = []
+@dataclass
+class WriteStats:
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def iter_sections(pages: Iterable[PageSections]) -> Iterator[tuple[int, str | None, str]]:
+    for page_number, sections in pages:
+        for section_path, section_text in sections:
+            yield page_number, section_path, section_text
+
+
+def iter_chunks(sections: Iterable[tuple[int, str | None, str]]) -> Iterator[ParsedChunk]:
+    chunks = chunk_document(
+        sections,
+        max_tokens=token_budget(),
+        overlap_tokens=settings.chunk_overlap_tokens,
+        min_tokens=settings.chunk_min_tokens,
+        token_lengths=token_lengths,
+    )
+    for chunk in chunks:
+        yield ParsedChunk(
+            text=chunk.text,
+            page_start=chunk.page_start,
+            page_end=chunk.page_end,
+            section_path=chunk.section_path,
+            excerpt=chunk.text[:300],
+            source_hash=hashlib.sha256(chunk.text.encode("utf-8")).hexdigest(),
+        )
+
+
+def fetch_reusable_vectors(version_id: str, source_hashes: list[str], model_name: str) -> dict[str, object]:
     with get_conn() as conn:
         with conn.cursor() as cur:
-            for index, chunk in enumerate(chunks):
-                cur.execute(
-                    """
-                    INSERT INTO chunks (
-                        document_version_id, chunk_index, page_start, page_end,
-                        section_path, text, excerpt, source_hash
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                    """,
-                    (
-                        version_id,
-                        index,
-                        chunk.page_start,
-                        chunk.page_end,
-                        chunk.section_path,
-                        chunk.text,
-                        chunk.excerpt,
-                        chunk.source_hash,
-                    ),
-                )
-                chunk_ids.append(cur.fetchone()["id"])
-        conn.commit()
-    return [str(chunk_id) for chunk_id in chunk_ids]
-
-
-def store_embeddings(chunk_ids: list[str], vectors: list[list[float]], model_name: str) -> None:
-    if not chunk_ids:
-        return
+            cur.execute(REUSABLE_VECTORS_SQL, (source_hashes, version_id, model_name))
+            rows = cur.fetchall()
+    return {row["source_hash"]: row["vector"] for row in rows}
+
+
+def embed_batches(
+    batches: Iterable[list[ParsedChunk]],
+    version_id: str,
+    model_name: str,
+    stats: IngestStats,
+) -> Iterator[tuple[list[ParsedChunk], list]]:
+    for batch in batches:
+        reusable = fetch_reusable_vectors(version_id, list({chunk.source_hash for chunk in batch}), model_name)
+        missing = [chunk for chunk in batch if chunk.source_hash not in reusable]
+        fresh = iter(embed_texts([chunk.text for chunk in missing]) if missing else [])
+        vectors = [reusable[chunk.source_hash] if chunk.source_hash in reusable else next(fresh) for chunk in batch]
+        stats.chunks += len(batch)
+        stats.reused += len(batch) - len(missing)
+        yield batch, vectors
+
+
+def fetch_version_filters(cur: psycopg.Cursor, version_id: str) -> dict:
+    cur.execute(VERSION_FILTERS_SQL, (version_id,))
+    row = cur.fetchone()
+    if row is None:
+        raise ValueError(f"document version not found: {version_id}")
+    return row
+
+
+def write_batch(
+    cur: psycopg.Cursor,
+    version_id: str,
+    version_filters: dict,
+    first_index: int,
+    chunks: list[ParsedChunk],
+    vectors: list,
+    model_name: str,
+) -> int:
+    chunk_ids = [uuid4() for _ in chunks]
+    # version_id arrives as a string from the task args.
+    version_uuid = UUID(version_id)
+    with cur.copy(CHUNKS_COPY_SQL) as copy:
+        copy.set_types(CHUNKS_COPY_TYPES)
+        for row in chunk_rows(version_uuid, first_index, chunk_ids, chunks):
+            copy.write_row(row)
+    with cur.copy(EMBEDDINGS_COPY_SQL) as copy:
+        copy.set_types(EMBEDDINGS_COPY_TYPES)
+        for row in embedding_rows(version_uuid, version_filters, chunk_ids, vectors, model_name):
+            copy.write_row(row)
+    return len(chunk_ids) * 2
+
+
+def ingest_version(
+    version_id: str,
+    file_path: str,
+    embeddings_model: str,
+    page_range: tuple[int, int] | None = None,
+) -> IngestStats:
+    # page_range is zero-based and end-exclusive. Chunk indexes start at 0 for
+    # every range; the fan-out finaliser renumbers them across the document.
+    # Chunks span pages but never a range boundary, so a range owns exactly
+    # the chunks whose page_start falls inside it.
+    start, end = page_range if page_range is not None else (0, None)
+    queue_size = settings.ingest_queue_size
+    ingest_stats = IngestStats()
+    # Each stage runs on its own thread; the wait_for_* entries are the time a
+    # stage sat idle on its upstream queue.
+    timings = StageTimings()
+    pages = prefetch(
+        timings.timed(
+            iter_page_sections(file_path, start=start, end=end),
+            "parse",
+        ),
+        queue_size,
+    )
+    chunks = iter_chunks(iter_sections(timings.timed(pages, "wait_for_parse")))
+    batches = prefetch(timings.timed(batched(chunks, settings.ingest_batch_size), "chunk"), queue_size)
+    embedded = prefetch(
+        timings.timed(
+            embed_batches(timings.timed(batches, "wait_for_chunk"), version_id, embeddings_model, ingest_stats),
+            "embed",
+        ),
+        queue_size,
+    )
+
+    chunk_count = 0
+    stats = WriteStats(rows=0, seconds=0.0)
     with get_conn() as conn:
-        register_vector(conn)
         with conn.cursor() as cur:
-            for chunk_id, vector in zip(chunk_ids, vectors, strict=True):
-                cur.execute(
-                    """
-                    INSERT INTO embeddings (chunk_id, model_name, embedding_dim, vector)
-                    VALUES (%s, %s, %s, %s)
-                    """,
-                    (chunk_id, model_name, len(vector), Vector(vector)),
-                )
-        conn.commit()
-
-
-def ingest_version(version_id: str, file_path: str, embeddings_model: str) -> int:
-    pages = parse_pdf(file_path)
-    chunks = build_chunks(pages)
-    chunk_ids = store_chunks(version_id, chunks)
-    if not chunk_ids:
-        return 0
-    vectors = embed_texts([chunk.text for chunk in chunks])
-    store_embeddings(chunk_ids, vectors, embeddings_model)
-    return len(chunk_ids)
+            version_filters = fetch_version_filters(cur, version_id)
+            with timings.stage("store"):
+                if page_range is None:
+                    cur.execute(DELETE_VERSION_CHUNKS_SQL, (version_id,))
+                else:
+                    cur.execute(DELETE_PAGE_RANGE_CHUNKS_SQL, (version_id, start, end))
+            for batch, vectors in timings.timed(embedded, "wait_for_embed"):
+                with timings.stage("store"):
+                    stats.rows += write_batch(
+                        cur, version_id, version_filters, chunk_count, batch, vectors, embeddings_model
+                    )
+                chunk_count += len(batch)
+        with timings.stage("store"):
+            conn.commit()
+    stats.seconds = timings.seconds("store")
+    ingest_stats.stage_timings = timings.as_milliseconds()
+
+    logger.info(
+        "stored %d chunks for version %s (%.0f%% embeddings reused): %d rows in %.2fs of writes (%.0f rows/s)",
+        chunk_count,
+        version_id,
+        ingest_stats.reuse_ratio * 100,
+        stats.rows,
+        stats.seconds,
+        stats.rows_per_second,
+    )
+    logger.info("stage timings for version %s (ms): %s", version_id, ingest_stats.stage_timings)
+    return ingest_stats
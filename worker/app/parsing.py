@@ -0,0 +1,34 @@
+﻿# worker/app/parsing.py
+from __future__ import annotations
+
+from typing import Iterator
+
+import fitz
+
+from app.sectioning import extract_sections
+
+Section = tuple[str | None, str]
+PageSections = tuple[int, list[Section]]
+
+
+def count_pages(file_path: str) -> int:
+    with fitz.open(file_path) as doc:
+        return len(doc)
+
+
+def page_ranges(start: int, end: int, size: int) -> list[tuple[int, int]]:
+    # Zero-based, end-exclusive ranges covering [start, end).
+    return [(range_start, min(range_start + size, end)) for range_start in range(start, end, size)]
+
+
+def iter_pages(file_path: str, start: int = 0, end: int | None = None) -> Iterator[tuple[int, str]]:
+    with fitz.open(file_path) as doc:
+        for page_number in range(start, len(doc) if end is None else min(end, len(doc))):
+            yield page_number + 1, doc[page_number].get_text("text")
+
+
+def iter_page_sections(file_path: str, start: int = 0, end: int | None = None) -> Iterator[PageSections]:
+    # Serial within a task; large documents are parsed in parallel by fanning
+    # page ranges out to separate Celery tasks (see tasks.py).
+    for page_number, text in iter_pages(file_path, start, end):
+        yield page_number, extract_sections(text)
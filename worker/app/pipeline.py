@@ -0,0 +1,129 @@
+﻿# worker/app/pipeline.py
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from queue import Empty, Full, Queue
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+@dataclass
+class _Failure:
+    error: BaseException
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    if size < 1:
+        raise ValueError("batch size must be at least 1")
+    batch: list[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def prefetch(items: Iterable[T], maxsize: int) -> Iterator[T]:
+    # Runs ``items`` on its own thread behind a bounded queue, so chained calls
+    # become concurrent stages that can only run ``maxsize`` items ahead.
+    queue: Queue = Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def put(item: object) -> bool:
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=_POLL_SECONDS)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce() -> None:
+        iterator = iter(items)
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+        except BaseException as exc:  # noqa: BLE001
+            put(_Failure(exc))
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, name="pipeline-stage", daemon=True)
+    thread.start()
+    try:
+        while True:
+            try:
+                item = queue.get(timeout=_POLL_SECONDS)
+            except Empty:
+                if not thread.is_alive() and queue.empty():
+                    return
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+class StageTimings:
+    # Seconds per stage, accumulated across pipeline threads. Stages nested on
+    # the same thread are exclusive: time spent in an inner stage (typically a
+    # wait on an upstream prefetch queue) is not counted for the outer one.
+    def __init__(self) -> None:
+        self._seconds: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._seconds[name] = self._seconds.get(name, 0.0) + seconds
+
+    def seconds(self, name: str) -> float:
+        with self._lock:
+            return self._seconds.get(name, 0.0)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        stack: list[float] = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.add(name, elapsed - nested)
+
+    def timed(self, items: Iterable[T], name: str) -> Iterator[T]:
+        # Charges the time spent producing each item to ``name``.
+        iterator = iter(items)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def as_milliseconds(self) -> dict[str, float]:
+        with self._lock:
+            return {name: round(seconds * 1000, 3) for name, seconds in self._seconds.items()}
@@ -0,0 +1,8 @@
+﻿# worker/app/redis_client.py
+from __future__ import annotations
+
+from redis import Redis
+
+from app.config import settings
+
+redis_client = Redis.from_url(settings.redis_url)
@@ -1,54 +1,126 @@
 ﻿# worker/app/tasks.py
 from __future__ import annotations
 
-from celery import shared_task
+from dataclasses import asdict
+
+from celery import chord, shared_task
+from psycopg.types.json import Jsonb
 
 from app.config import settings
+from app.corpus import bump_epoch, publish_epoch
 from app.db import get_conn
-from app.ingestion import ingest_version
+from app.ingestion import IngestStats, ingest_version
+from app.parsing import count_pages, page_ranges
+
+START_JOB_SQL = """
+    UPDATE ingestion_jobs
+    SET status = 'processing', started_at = COALESCE(ingestion_jobs.started_at, NOW()), error_message = NULL
+    FROM document_versions
+    WHERE ingestion_jobs.id = %s
+      AND document_versions.id = %s
+      AND document_versions.id = ingestion_jobs.document_version_id
+    RETURNING document_versions.file_path
+"""
+
+FAIL_JOB_SQL = """
+    UPDATE ingestion_jobs
+    SET status = 'failed', error_message = %s, finished_at = NOW()
+    WHERE id = %s AND status <> 'failed'
+"""
+
+COMPLETE_JOB_SQL = """
+    UPDATE ingestion_jobs
+    SET status = 'completed', finished_at = NOW(), chunks_total = %s, chunks_reused = %s, stage_timings = %s
+    WHERE id = %s
+"""
+
+# Page-range subtasks number their chunks from 0; restore document order.
+RENUMBER_CHUNKS_SQL = """
+    UPDATE chunks
+    SET chunk_index = ordered.position
+    FROM (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY page_start, chunk_index) - 1 AS position
+        FROM chunks
+        WHERE document_version_id = %s
+    ) AS ordered
+    WHERE chunks.id = ordered.id AND chunks.chunk_index <> ordered.position
+"""
+
+
+def _fail_job(job_id: str, error_message: str) -> None:
+    with get_conn() as conn:
+        conn.execute(FAIL_JOB_SQL, (error_message, job_id))
+        conn.commit()
+
+
+def _complete_job(version_id: str, job_id: str, stats: IngestStats, renumber: bool) -> None:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            if renumber:
+                cur.execute(RENUMBER_CHUNKS_SQL, (version_id,))
+            cur.execute(COMPLETE_JOB_SQL, (stats.chunks, stats.reused, Jsonb(stats.stage_timings), job_id))
+            epoch = bump_epoch(cur)
+        conn.commit()
+    publish_epoch(epoch)
 
 
 @shared_task(name="worker.ingest_document_version")
 def ingest_document_version(version_id: str, job_id: str):
     with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "UPDATE ingestion_jobs SET status = %s, started_at = NOW() WHERE id = %s",
-                ("processing", job_id),
-            )
-            cur.execute(
-                "SELECT file_path FROM document_versions WHERE id = %s",
-                (version_id,),
-            )
-            row = cur.fetchone()
+        row = conn.execute(START_JOB_SQL, (job_id, version_id)).fetchone()
         conn.commit()
 
     if not row or not row.get("file_path"):
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "UPDATE ingestion_jobs SET status = %s, error_message = %s, finished_at = NOW() WHERE id = %s",
-                    ("failed", "file_path_missing", job_id),
-                )
-            conn.commit()
+        _fail_job(job_id, "file_path_missing")
         return
 
+    file_path = row["file_path"]
     try:
-        ingest_version(version_id, row["file_path"], settings.embeddings_model)
+        page_count = count_pages(file_path)
     except Exception as exc:  # noqa: BLE001
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "UPDATE ingestion_jobs SET status = %s, error_message = %s, finished_at = NOW() WHERE id = %s",
-                    ("failed", str(exc), job_id),
-                )
-            conn.commit()
+        _fail_job(job_id, str(exc))
         raise
 
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "UPDATE ingestion_jobs SET status = %s, finished_at = NOW() WHERE id = %s",
-                ("completed", job_id),
-            )
-        conn.commit()
+    # Large documents fan out into page-range subtasks so they spread across
+    # the worker fleet; the chord body runs once every range has been stored.
+    if settings.ingest_pages_per_task > 0 and page_count > settings.ingest_pages_per_task:
+        header = [
+            ingest_page_range.s(version_id, job_id, file_path, start, end)
+            for start, end in page_ranges(0, page_count, settings.ingest_pages_per_task)
+        ]
+        chord(header)(finalize_ingestion.s(version_id, job_id).on_error(mark_ingestion_failed.s(job_id)))
+        return
+
+    try:
+        stats = ingest_version(version_id, file_path, settings.embeddings_model)
+    except Exception as exc:  # noqa: BLE001
+        _fail_job(job_id, str(exc))
+        raise
+    _complete_job(version_id, job_id, stats, renumber=False)
+
+
+@shared_task(name="worker.ingest_page_range")
+def ingest_page_range(version_id: str, job_id: str, file_path: str, start: int, end: int) -> dict:
+    try:
+        stats = ingest_version(version_id, file_path, settings.embeddings_model, page_range=(start, end))
+    except Exception as exc:  # noqa: BLE001
+        _fail_job(job_id, f"pages {start + 1}-{end}: {exc}")
+        raise
+    return asdict(stats)
+
+
+@shared_task(name="worker.finalize_ingestion")
+def finalize_ingestion(results: list[dict], version_id: str, job_id: str):
+    stats = IngestStats()
+    for result in results:
+        stats.chunks += result["chunks"]
+        stats.reused += result["reused"]
+        for stage, milliseconds in result["stage_timings"].items():
+            stats.stage_timings[stage] = round(stats.stage_timings.get(stage, 0.0) + milliseconds, 3)
+    _complete_job(version_id, job_id, stats, renumber=True)
+
+
+@shared_task(name="worker.mark_ingestion_failed")
+def mark_ingestion_failed(request, exc, traceback, job_id: str):  # noqa: ARG001
+    # Chord error callback; subtasks normally record their own failure first.
+    _fail_job(job_id, str(exc))